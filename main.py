@@ -1,4 +1,5 @@
 import asyncio
+import sys
 from pathlib import Path
 import logging
 from utils.logger import logger
@@ -11,37 +12,60 @@ async def main():
     scraper = WebScraper()
     web_searcher = WebSearcher()
     
-    while True:
-        try:
-            query = input("\nEnter your search query (or type 'exit' to quit):\n\n> ")
-            
-            if query.lower() == 'exit':
-                print("\nGoodbye!\n")
-                break
+    try:
+        while True:
+            try:
+                # Read stdin off the event loop so pooled connections stay serviced
+                query = await asyncio.to_thread(input, "\nEnter your search query (or type 'exit' to quit):\n\n> ")
+                
+                if query.lower() == 'exit':
+                    print("\nGoodbye!\n")
+                    break
+                    
+                print(f"\nSearching for: {query}")
+                logger.info(f"Starting search for query: {query}")
+                
+                # Run the search while the scrape storage is being prepared
+                search_task = asyncio.create_task(web_searcher.search(query))
+                
+                # Set query and initialize storage
+                try:
+                    await scraper.set_query(query)
+                except BaseException:
+                    # Don't leave the search running unobserved when storage setup fails
+                    search_task.cancel()
+                    await asyncio.gather(search_task, return_exceptions=True)
+                    raise
                 
-            print(f"\nSearching for: {query}")
-            logger.info(f"Starting search for query: {query}")
-            
-            # Set query and initialize storage
-            await scraper.set_query(query)
-            
-            # Get real search results
-            search_results = await web_searcher.search(query)
-            if not search_results:
-                print("\nNo search results found. Try a different query.")
+                # Get real search results
+                search_results = await search_task
+                if not search_results:
+                    print("\nNo search results found. Try a different query.")
+                    continue
+                
+                # Scrape results
+                scrape_results = await scraper.scrape(search_results)
+                
+                # Display summary
+                # Every page result carries a boolean "success" key
+                success_count = sum(r["success"] for r in scrape_results)
+                print(f"\nScraping completed! Successfully scraped {success_count}/{len(search_results)} URLs.")
+                
+            except Exception as e:
+                logger.error("Error in main loop: %s", e)
+                print(f"\nAn error occurred: {e}")
                 continue
-            
-            # Scrape results
-            scrape_results = await scraper.scrape(search_results)
-            
-            # Display summary
-            success_count = sum(1 for r in scrape_results if r.get("success"))
-            print(f"\nScraping completed! Successfully scraped {success_count}/{len(search_results)} URLs.")
-            
-        except Exception as e:
-            logger.error(f"Error in main loop: {e}")
-            print(f"\nAn error occurred: {e}")
-            continue
+    finally:
+        # Release the scraper's and searcher's pooled connections
+        await scraper.aclose()
+        await web_searcher.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # uvloop is optional; fall back to the default event loop when it is unavailable
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import math
+
+import pytest
+
+from web_search.components import bm25
+from web_search.components.bm25 import BM25Scorer
+
+DOCS = [
+    "python web scraping with python",
+    "web search engines rank pages",
+    "bm25 ranks documents for the search query",
+]
+
+
+def reference_bm25(query, documents, k1=1.2, b=0.75):
+    tokenized = [doc.lower().split() for doc in documents]
+    avgdl = sum(len(doc) for doc in tokenized) / len(tokenized)
+    n = len(tokenized)
+    scores = []
+    for doc in tokenized:
+        total = 0.0
+        for term in set(query.lower().split()):
+            tf = doc.count(term)
+            if not tf:
+                continue
+            df = sum(term in d for d in tokenized)
+            idf = math.log((n - df + 0.5) / (df + 0.5) + 1)
+            total += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+        scores.append(total)
+    top = max(scores)
+    return [s / top for s in scores] if top > 0 else scores
+
+
+def test_scores_match_reference_bm25():
+    query = "python search"
+    scores = BM25Scorer().score(query, DOCS)
+    assert scores == pytest.approx(reference_bm25(query, DOCS))
+
+
+def test_idf_is_per_term():
+    # "bm25" appears in one document, "search" in two: the rarer term must weigh more
+    scorer = BM25Scorer()
+    scorer.index(DOCS)
+    assert scorer.score("bm25")[2] == pytest.approx(1.0)
+    assert scorer.score("search bm25").index(1.0) == 2
+
+
+def test_unknown_terms_and_empty_documents():
+    scorer = BM25Scorer()
+    assert scorer.score("query", []) == []
+    assert scorer.score("missing", DOCS) == [0.0, 0.0, 0.0]
+    assert scorer.score("query", ["", ""]) == [0.0, 0.0]
+
+
+def test_score_batch_matches_single_queries():
+    scorer = BM25Scorer()
+    scorer.index(DOCS)
+    queries = ["python search", "bm25", "missing"]
+    batch = scorer.score_batch(queries)
+    for query, row in zip(queries, batch):
+        assert row == pytest.approx(scorer.score(query))
+
+
+def test_reindexing_overlapping_corpus_reuses_term_counts():
+    scorer = BM25Scorer()
+    scorer.index(DOCS)
+    # Two documents carried over from the previous corpus, one new
+    corpus = DOCS[1:] + ["python pages about python"]
+    scorer.index(corpus)
+    assert scorer.score("python search") == pytest.approx(reference_bm25("python search", corpus))
+
+
+def test_term_counts_persist_across_scorers(tmp_path):
+    BM25Scorer(cache_dir=tmp_path).index(DOCS)
+    assert len(list((tmp_path / "terms").glob("*.json"))) == len(DOCS)
+    # A new corpus over the same pages is built from the saved counts
+    corpus = DOCS[::-1]
+    scores = BM25Scorer(cache_dir=tmp_path).score("python search", corpus)
+    assert scores == pytest.approx(reference_bm25("python search", corpus))
+
+
+def test_term_counts_on_disk_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25, "_TERM_COUNTS_MAX_FILES", 2)
+    monkeypatch.setattr(bm25, "_TERM_COUNTS_PRUNE_EVERY", 1)
+    BM25Scorer(cache_dir=tmp_path).index(DOCS)
+    assert len(list((tmp_path / "terms").glob("*.json"))) == 2
+
+
+def test_saved_index_is_reloaded_by_a_fresh_scorer(tmp_path, monkeypatch):
+    BM25Scorer(cache_dir=tmp_path).index(DOCS)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    def fail(self, documents):
+        raise AssertionError("index rebuilt instead of loaded")
+
+    monkeypatch.setattr(BM25Scorer, "_count_terms", fail)
+    scorer = BM25Scorer(cache_dir=tmp_path)
+    scorer.index(DOCS)
+    assert scorer.score("python search") == pytest.approx(reference_bm25("python search", DOCS))
+    assert scorer.score_batch(["bm25"])[0] == pytest.approx(scorer.score("bm25"))
+
+
+def test_saved_indexes_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25, "_INDEX_MAX_ENTRIES", 1)
+    scorer = BM25Scorer(cache_dir=tmp_path)
+    scorer.index(DOCS)
+    scorer.index(DOCS[:2])
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    assert len(list(tmp_path.glob("*.vocab.json"))) == 1
+
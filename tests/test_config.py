@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+import yaml
+
+from utils.config import Config, config # Config singleton instance
+
+
+def test_config_loads_yaml_once(monkeypatch):
+    monkeypatch.setenv("CONFIG_NO_CACHE", "1")
+    original_instance = Config._instance
+    Config._instance = None
+    try:
+        with patch('utils.config.yaml.safe_load', wraps=yaml.safe_load) as mock_safe_load:
+            first = Config()
+            second = Config()
+            third = Config()
+        assert first is second is third
+        assert mock_safe_load.call_count == 1
+    finally:
+        Config._instance = original_instance
+
+def test_config_singleton_returns_module_instance():
+    assert Config() is config
+
+def test_get_resolves_dotted_paths():
+    assert config.get('search.max_results') == config.settings.search.max_results
+    assert config.get('logging') is config.settings.logging
+    assert config.get('search.does_not_exist', 'fallback') == 'fallback'
+
+def test_get_sees_in_place_assignments():
+    original = config.settings.search.max_results
+    try:
+        config.settings.search.max_results = original + 1
+        assert config.get('search.max_results') == original + 1
+    finally:
+        config.settings.search.max_results = original
+
+def test_is_url_blocked_by_extension():
+    blocked_ext = config.settings.url_validation.blocked_extensions[0]
+    assert config.is_url_blocked(f"https://example.com/download/setup{blocked_ext.upper()}")
+    assert not config.is_url_blocked("https://example.com/article.html")
+
+def test_config_cache_invalidated_by_model_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_path", tmp_path / "config.cache.json")
+    config._write_cached_settings(config._cache_stamp())
+    assert config._load_cached_settings(config._cache_stamp()) is not None
+    # A changed AppConfig (added field, new default) changes its schema
+    monkeypatch.setattr(
+        "utils.config.AppConfig.model_json_schema",
+        classmethod(lambda cls, *args, **kwargs: {"title": "AppConfig", "changed": True})
+    )
+    assert config._load_cached_settings(config._cache_stamp()) is None
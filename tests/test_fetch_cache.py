@@ -0,0 +1,33 @@
+import pytest
+
+from utils import fetch_cache
+from utils.fetch_cache import FetchCache
+
+
+@pytest.mark.asyncio
+async def test_entries_round_trip(tmp_path):
+    cache = FetchCache(tmp_path, ttl=60)
+    await cache.set("https://example.com/a", "body", etag='"v1"')
+    entry = await cache.get("https://example.com/a")
+    assert entry["body"] == "body" and entry["etag"] == '"v1"'
+    assert FetchCache.is_fresh(entry, cache.ttl)
+    assert await cache.get("https://example.com/missing") is None
+
+
+@pytest.mark.asyncio
+async def test_entries_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_cache, "_PRUNE_EVERY", 1)
+    cache = FetchCache(tmp_path, ttl=60, max_entries=2)
+    for i in range(4):
+        await cache.set(f"https://example.com/{i}", "body")
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(fetch_cache.os, "replace", fail)
+    await FetchCache(tmp_path, ttl=60).set("https://example.com/a", "body")
+    assert list(tmp_path.iterdir()) == []
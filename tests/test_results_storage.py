@@ -2,6 +2,7 @@ import pytest
 import asyncio
 import json
 import os
+import shutil
 from pathlib import Path
 from datetime import datetime
 
@@ -226,3 +227,12 @@ async def test_circuit_breaker_file_ops_exists(storage_search: ResultsStorage):
 
 #         # To test reset, you might need to advance time if using time-based reset
 #         # For pybreaker, if reset_timeout is set, it will transition to HALF_OPEN then CLOSED/OPEN
+
+@pytest.mark.asyncio
+async def test_is_ready_recreates_removed_directories(tmp_path: Path):
+    await ResultsStorage(tmp_path / "first", TEST_QUERY_NORMAL).initialize()
+    # The directories are remembered as created; remove them behind the class's back
+    shutil.rmtree(tmp_path / "first")
+    rs = ResultsStorage(tmp_path / "first", TEST_QUERY_NORMAL)
+    assert await rs.is_ready()
+    assert rs.search_results_dir.is_dir()
@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+from typing import List, Union
+from utils.logger import logger
+
+def prune_oldest(directory: Union[str, Path], suffix: str, max_files: int) -> List[str]:
+    """Delete the oldest files in directory ending in suffix beyond max_files.
+
+    Age is the modification time. Returns the paths that were deleted.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            files = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(suffix)]
+    except OSError as e:
+        logger.warning(f"Could not scan cache directory {directory}: {e}")
+        return []
+    excess = len(files) - max_files
+    if excess <= 0:
+        return []
+    files.sort()
+    removed = []
+    for _, path in files[:excess]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
@@ -1,11 +1,29 @@
 import os
+import json
+import hashlib
 import yaml
 from dotenv import load_dotenv
 from pathlib import Path
+from urllib.parse import urlsplit
 from pydantic import ValidationError, BaseModel
 from .config_models import AppConfig, SearchConfig, URLValidationConfig, ScrapingConfig, BM25Config, LoggingConfig
 import logging
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Basic logger for config loading issues, independent of the main app logger
 _config_loader_logger = logging.getLogger('config_loader')
 # Configure this basic logger minimally if not already configured elsewhere
@@ -27,21 +45,35 @@ class Config:
         return cls._instance
 
     def __init__(self):
+        # Only the first Config() call loads anything; later calls reuse the singleton state
+        if getattr(self, '_initialized', False):
+            return
+        
         # Get the root directory (parent of utils)
         current_dir = Path(__file__).parent
         root_dir = current_dir.parent
         
         # Load environment variables
         env_path = root_dir / ".env"
-        if hasattr(self, '_initialized') and self._initialized: # Check if already initialized
-            return
-        
         load_dotenv(env_path)
         
         # Load YAML config
         self.config_path = config_path = root_dir / "config.yaml"
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file not found at {config_path}")
+        
+        # Reuse the validated snapshot from the last run while config.yaml and the models are unchanged
+        self.cache_path = root_dir / "config.cache.json"
+        use_cache = os.getenv("CONFIG_NO_CACHE") != "1"
+        stamp = self._cache_stamp()
+        if use_cache:
+            cached_settings = self._load_cached_settings(stamp)
+            if cached_settings is not None:
+                self.settings = cached_settings
+                self.reindex()
+                self._initialized = True
+                _config_loader_logger.info("Configuration loaded from cache.")
+                return
             
         with open(config_path, 'r') as f:
             yaml_data = yaml.safe_load(f)
@@ -61,33 +93,104 @@ class Config:
             _config_loader_logger.error(detailed_error_message)
             raise ValueError(detailed_error_message) from e
 
+        if use_cache:
+            self._write_cached_settings(stamp)
+        self.reindex()
+        self._initialized = True
+
+    def _cache_stamp(self) -> dict:
+        """Identify the inputs of the validated settings: config.yaml and the AppConfig schema.
+
+        The schema hash invalidates the cache when config_models.py changes (new fields,
+        new defaults) while config.yaml does not.
+        """
+        stat = self.config_path.stat()
+        schema = json.dumps(AppConfig.model_json_schema(), sort_keys=True, default=str)
+        return {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "schema": hashlib.blake2b(schema.encode("utf-8"), digest_size=16).hexdigest()
+        }
+
+    def _load_cached_settings(self, stamp: dict):
+        """Return AppConfig from the JSON cache if it matches the current stamp, else None."""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = _json_loads(f.read())
+            if cached.get("stamp") != stamp:
+                return None
+            return AppConfig.model_validate(cached["settings"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            _config_loader_logger.warning(f"Ignoring unreadable config cache {self.cache_path}: {e}")
+            return None
+
+    def _write_cached_settings(self, stamp: dict) -> None:
+        """Write the validated settings and their stamp to the JSON cache."""
+        tmp_path = self.cache_path.with_suffix(".json.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_json_dumps({"stamp": stamp, "settings": self.settings.model_dump(mode="json")}))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            _config_loader_logger.warning(f"Could not write config cache {self.cache_path}: {e}")
+
     def get(self, key_path: str, default=None):
         """
         Retrieves a value from the loaded Pydantic configuration model using a dot-separated key path.
         Example: 'search.max_results' will access config.settings.search.max_results.
+
+        The index maps each path to its parent object and field name, so assigning a field in
+        place (config.settings.directories.base = ...) is seen immediately, and a replaced
+        config.settings is reindexed automatically. Replacing a nested model (e.g.
+        config.settings.directories = ...) requires a call to reindex().
         """
-        obj = self.settings
-        keys = key_path.split('.')
-        current_path_trace = []
-
-        for key in keys:
-            current_path_trace.append(key)
-            if isinstance(obj, BaseModel):  # Pydantic model
-                if hasattr(obj, key):
-                    obj = getattr(obj, key)
-                else:
-                    # logger.debug(f"Key '{key}' not found in Pydantic model at path '{'.'.join(current_path_trace)}'. Returning default.")
-                    return default
-            elif isinstance(obj, dict):  # Dictionary
-                if key in obj:
-                    obj = obj[key]
-                else:
-                    # logger.debug(f"Key '{key}' not found in dictionary at path '{'.'.join(current_path_trace)}'. Returning default.")
-                    return default
-            else:  # Primitive type or list, cannot go deeper with attribute/key access
-                # logger.debug(f"Cannot access key '{key}' in non-model/non-dict type ({type(obj)}) at path '{'.'.join(current_path_trace)}'. Returning default.")
-                return default
-        return obj
+        if self._indexed_settings is not self.settings:
+            self.reindex()
+        entry = self._flat.get(key_path)
+        if entry is None:
+            return default
+        parent, key = entry
+        if isinstance(parent, dict):
+            return parent.get(key, default)
+        return getattr(parent, key, default)
+
+    def reindex(self) -> None:
+        """Rebuild the dotted-key index and URL blocklist; call after replacing nested settings
+        models or editing the blocklists in place."""
+        self._flat = {}
+        self._indexed_settings = self.settings
+        self._index_value('', self.settings)
+        url_validation = self.settings.url_validation
+        self._blocked_domains = frozenset(d.lower() for d in url_validation.blocked_domains)
+        self._blocked_exts = frozenset(ext.lower() for ext in url_validation.blocked_extensions)
+
+    def is_domain_blocked(self, hostname: str) -> bool:
+        """Check a hostname against the blocked_domains set."""
+        return bool(hostname) and hostname.lower() in self._blocked_domains
+
+    def has_blocked_extension(self, path: str) -> bool:
+        """Check whether a URL path ends in one of the blocked_extensions."""
+        return os.path.splitext(path)[1].lower() in self._blocked_exts
+
+    def is_url_blocked(self, url: str) -> bool:
+        """Check a URL's host and file extension against the configured blocklists."""
+        parts = urlsplit(url)
+        return self.is_domain_blocked(parts.hostname) or self.has_blocked_extension(parts.path)
+
+    def _index_value(self, prefix: str, obj) -> None:
+        if isinstance(obj, BaseModel):  # Pydantic model
+            children = ((name, getattr(obj, name)) for name in obj.model_fields)
+        elif isinstance(obj, dict):  # Dictionary
+            children = obj.items()
+        else:  # Primitive type or list, cannot go deeper with attribute/key access
+            return
+        for key, value in children:
+            key_path = f"{prefix}.{key}" if prefix else str(key)
+            # Parent and field, not the value, so in-place assignments are read back fresh
+            self._flat[key_path] = (obj, key)
+            self._index_value(key_path, value)
 
     def get_env(self, key, default=None):
         """Get value from environment variables."""
@@ -41,6 +41,7 @@ class ScrapingModesConfig(BaseModel):
 
 class ScrapingConfig(BaseModel):
     max_concurrent: PositiveInt = 5
+    max_connections_per_host: PositiveInt = 4
     timeout: PositiveInt = 30000
     modes: ScrapingModesConfig = Field(default_factory=ScrapingModesConfig)
     rate_limit: RateLimitConfig = Field(default_factory=RateLimitConfig)
@@ -68,11 +69,18 @@ class URLValidationConfig(BaseModel):
     max_content_size: int = 10485760  # 10MB
     allow_video_urls: bool = False
     allow_auth_required: bool = False
+    url_fetch_request_timeout: int = 15  # seconds
     url_fetch_session_timeout_total: int = 60  # seconds
+    url_fetch_connection_timeout: int = 10  # seconds
+    url_fetch_cache_ttl: int = 3600  # seconds; 0 disables the on-disk fetch cache
+    url_fetch_max_bytes: PositiveInt = 524288  # page bytes read for ranking; the rest is not downloaded
+    url_fetch_cache_max_entries: PositiveInt = 10000  # pages kept in the on-disk fetch cache; oldest pruned
 
 class BM25Config(BaseModel):
     k1: confloat(gt=0) = 1.2
     b: confloat(ge=0, le=1) = 0.75
+    # Directory for persisted BM25 indexes and per-document term counts; disabled when empty
+    index_cache_dir: Optional[str] = None
 
 class LoggingConfig(BaseModel):
     level: str = "INFO"
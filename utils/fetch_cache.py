@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+from utils.logger import logger
+from utils.cache_files import prune_oldest
+
+# Cache writes between two pruning scans (the first write of a process also prunes)
+_PRUNE_EVERY = 256
+
+class FetchCache:
+    def __init__(self, cache_dir: Path, ttl: float, max_entries: int = 10000):
+        """Initialize an on-disk cache of fetched page bodies, one JSON file per URL.
+
+        Beyond max_entries files, the oldest are deleted.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._writes = 0
+
+    def _path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()}.json"
+
+    @staticmethod
+    def is_fresh(entry: Dict, ttl: float) -> bool:
+        return time.time() - entry.get("ts", 0) < ttl
+
+    def _read(self, path: Path) -> Optional[Dict]:
+        try:
+            with open(path, "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fetch cache entry {path}: {e}")
+            return None
+
+    def _write(self, path: Path, entry: Dict, prune: bool) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Temp file then rename, so concurrent readers never see a partial entry
+        tmp_path = path.with_name(f"{path.name}.tmp.{uuid.uuid4().hex}")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if prune:
+            prune_oldest(self.cache_dir, ".json", self.max_entries)
+
+    async def get(self, url: str) -> Optional[Dict]:
+        """Return the stored entry for url (fresh or stale), or None."""
+        return await asyncio.to_thread(self._read, self._path(url))
+
+    async def set(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store body for url with its validators, timestamped now."""
+        entry = {"ts": time.time(), "body": body, "etag": etag, "last_modified": last_modified}
+        # Counted here, on the event loop, so concurrent writes agree on who prunes
+        self._writes += 1
+        prune = (self._writes - 1) % _PRUNE_EVERY == 0
+        try:
+            await asyncio.to_thread(self._write, self._path(url), entry, prune)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write fetch cache entry for {url}: {e}")
@@ -0,0 +1,32 @@
+from html.parser import HTMLParser
+from typing import List
+
+class _TextCollector(HTMLParser):
+    """Collect stripped text nodes as the tokenizer emits them, without building a tree"""
+    _SKIP_TAGS = frozenset(('script', 'style', 'template', 'noscript', 'svg'))
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            data = data.strip()
+            if data:
+                self.parts.append(data)
+
+def extract_text(html: str) -> str:
+    """Visible text of an HTML document, space-joined like soup.get_text(" ", strip=True)"""
+    collector = _TextCollector()
+    collector.feed(html)
+    collector.close()
+    return " ".join(collector.parts)
@@ -1,4 +1,7 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from pathlib import Path
 from utils.config import config
@@ -18,6 +21,12 @@ class Logger:
         
         # Set log level
         self.logger.setLevel(logging_config.level)
+        # Records are handled here only, not again by the root logger
+        self.logger.propagate = False
+        
+        # Handlers are attached once per process, however often this module is imported
+        if self.logger.handlers:
+            return
         
         # Create formatter
         formatter = logging.Formatter(logging_config.format)
@@ -25,7 +34,7 @@ class Logger:
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        handlers = [console_handler]
         
         # File handler if specified
         if logging_config.file:
@@ -33,7 +42,21 @@ class Logger:
             file_path.parent.mkdir(parents=True, exist_ok=True)
             file_handler = logging.FileHandler(file_path)
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        
+        # Callers only enqueue records; a background thread does the console/file I/O
+        log_queue = queue.Queue(-1)
+        self.logger.addHandler(QueueHandler(log_queue))
+        self.listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._listening = True
+        atexit.register(self.stop)
+    
+    def stop(self):
+        """Flush queued records and stop the background listener"""
+        if getattr(self, '_listening', False):
+            self._listening = False
+            self.listener.stop()
     
     def get_logger(self):
         return self.logger
@@ -1,26 +1,141 @@
 import json
 import os
 import asyncio
+import re
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Set, Union
 import aiofiles
 import aiofiles.os
-from pydantic import BaseModel, HttpUrl
+import aiohttp
+from pydantic import BaseModel, HttpUrl, TypeAdapter
 from utils.config import config
 from utils.logger import logger
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to indented UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+
+def _loads(data: bytes):
+    """Parse JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class SearchResultModel(BaseModel):
     query: str
-    urls: List[HttpUrl]
+    # Plain strings: URLs are validated once, in bulk, before the model is built
+    urls: List[str]
     timestamp: str
     metadata: Optional[Dict] = None
 
+# Validates a whole batch of URLs in one call
+_URL_LIST_ADAPTER = TypeAdapter(List[HttpUrl])
+
+# Reusable scratch buffers for streaming response bodies to disk
+_BUF_SIZE = 64 * 1024
+_BUF_POOL: deque = deque(maxlen=64)
+
+async def _stream_to_file(f, response: aiohttp.ClientResponse) -> None:
+    """Coalesce response chunks into a pooled buffer and write it out in full blocks"""
+    buf = _BUF_POOL.pop() if _BUF_POOL else bytearray(_BUF_SIZE)
+    view = memoryview(buf)
+    filled = 0
+    try:
+        async for chunk in response.content.iter_any():
+            chunk_view = memoryview(chunk)
+            offset = 0
+            while offset < len(chunk_view):
+                n = min(_BUF_SIZE - filled, len(chunk_view) - offset)
+                view[filled:filled + n] = chunk_view[offset:offset + n]
+                filled += n
+                offset += n
+                if filled == _BUF_SIZE:
+                    await f.write(view)
+                    filled = 0
+        if filled:
+            await f.write(view[:filled])
+    finally:
+        view.release()
+        _BUF_POOL.append(buf)
+
+def _atomic_write_sync(filepath: str, data: bytes) -> None:
+    tmp_path = f"{filepath}.tmp.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+async def _atomic_write(filepath: str, data: bytes) -> None:
+    """Write a complete in-memory payload atomically with one thread-pool hop"""
+    await asyncio.to_thread(_atomic_write_sync, filepath, data)
+
+@asynccontextmanager
+async def _atomic_open(filepath: str, mode: str, **kwargs):
+    """Stream to a temp file in the target directory, then rename it over filepath"""
+    tmp_path = f"{filepath}.tmp.{uuid.uuid4().hex}"
+    try:
+        async with aiofiles.open(tmp_path, mode, **kwargs) as f:
+            yield f
+        await aiofiles.os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+# Max metadata files written per writer-task iteration
+_META_BATCH_SIZE = 32
+
+# Character maps for filename / directory-name sanitizing
+_FILENAME_TRANS = str.maketrans({'/': '_', '?': '_', '=': '_'})
+_FILENAME_STRIP = re.compile(r'[^\w.\-]')
+_QUERY_STRIP = re.compile(r'[^\w \-]')
+
+@lru_cache(maxsize=4096)
+def _safe_filename(text: str) -> str:
+    return _FILENAME_STRIP.sub('', text.replace("://", "_").translate(_FILENAME_TRANS))[:200]
+
 class ResultsStorage:
+    # Directories already created in this process; a storage re-created for the
+    # same query skips the makedirs calls for these
+    _known_dirs: Set[str] = set()
+
     def __init__(self, base_dir: Path, query: str):
         self.base_dir = base_dir
         self.query = query
+        self._compute_paths()
         
+        # Track initialization state
+        self._initialized = False
+        # Set once every directory exists, so writes skip further mkdir/stat calls
+        self._dirs_ready = asyncio.Event()
+        self._ready_cached: Optional[bool] = None
+        self._probed = False
+        # Metadata JSONs are written in batches by a background task
+        self._meta_queue: asyncio.Queue = asyncio.Queue()
+        self._meta_writer: Optional[asyncio.Task] = None
+    
+    def _compute_paths(self):
+        """Build directory paths once; writes use the precomputed str forms"""
         # Initialize directory paths
         self.search_results_dir = self.base_dir / "Search_Results"
         self.scraped_results_dir = self.base_dir / "Scraped_Results"
@@ -33,8 +148,21 @@ class ResultsStorage:
         self.scrape_formula_dir = self.scraped_results_dir / "formulas"
         self.scrape_meta_dir = self.scraped_results_dir / "metadata"
         
-        # Track initialization state
-        self._initialized = False
+        self._scrape_subdir_names = frozenset(
+            d.name for d in (
+                self.scrape_html_dir, self.scrape_pdf_dir, self.scrape_image_dir,
+                self.scrape_text_dir, self.scrape_formula_dir, self.scrape_meta_dir
+            )
+        )
+        self._search_results_dir_s = str(self.search_results_dir)
+        self._scrape_meta_dir_s = str(self.scrape_meta_dir)
+        self._content_dirs_s = {
+            "html": str(self.scrape_html_dir),
+            "pdf": str(self.scrape_pdf_dir),
+            "image": str(self.scrape_image_dir),
+            "text": str(self.scrape_text_dir),
+            "formula": str(self.scrape_formula_dir)
+        }
     
     async def initialize(self):
         """Initialize storage directories"""
@@ -46,118 +174,263 @@ class ResultsStorage:
     
     async def is_ready(self) -> bool:
         """Check if storage is ready for use"""
+        # Directories don't disappear mid-query, so a positive result is cached
+        if self._ready_cached:
+            return True
         logger.debug(f"Checking storage readiness for query: {self.query}")
         if not self._initialized:
             await self.initialize()
-            
+        
+        ready = await self._check_ready()
+        if not ready:
+            # _known_dirs may list directories removed since they were created (cleanup,
+            # a deleted data directory); forget them and create them again
+            ResultsStorage._known_dirs.difference_update(self._leaf_dirs())
+            try:
+                await self._ensure_directories_ready()
+            except RuntimeError:
+                return False
+            ready = await self._check_ready()
+        
+        self._ready_cached = ready
+        logger.debug(f"Storage readiness check completed: {ready}")
+        return ready
+    
+    async def _check_ready(self) -> bool:
+        """Verify all directories exist and are writable"""
         try:
-            # Verify all directories exist and are writable
-            test_file = self.base_dir / "test_write.tmp"
-            async with aiofiles.open(test_file, "w") as f:
-                await f.write("test")
-            test_file.unlink()
-            
-            ready = all([
-                self.search_results_dir.exists(),
-                self.scrape_html_dir.exists(),
-                self.scrape_pdf_dir.exists(),
-                self.scrape_image_dir.exists(),
-                self.scrape_text_dir.exists(),
-                self.scrape_formula_dir.exists(),
-                self.scrape_meta_dir.exists()
-            ])
-            
-            logger.debug(f"Storage readiness check completed: {ready}")
-            return ready
+            await self._write_probe_once()
             
+            # One directory listing covers all scrape subdirectories
+            with os.scandir(self.scraped_results_dir) as entries:
+                present = {entry.name for entry in entries if entry.is_dir()}
+            return self.search_results_dir.is_dir() and self._scrape_subdir_names <= present
         except Exception as e:
             logger.error(f"Storage readiness check failed: {e}")
             return False
     
+    async def _write_probe_once(self) -> None:
+        """Create and delete a probe file the first time readiness is checked"""
+        if self._probed:
+            return
+        test_file = self.base_dir / "test_write.tmp"
+        async with aiofiles.open(test_file, "w") as f:
+            await f.write("test")
+        test_file.unlink()
+        self._probed = True
+    
+    def _leaf_dirs(self) -> List[str]:
+        # Leaf directories only; makedirs creates the shared parents along the way
+        return [self._search_results_dir_s, self._scrape_meta_dir_s, *self._content_dirs_s.values()]
+    
     async def _ensure_directories_ready(self) -> None:
         """Create all required directories"""
         logger.info(f"Creating storage directories for query: {self.query}")
         try:
-            for directory in [
-                self.search_results_dir,
-                self.scrape_html_dir,
-                self.scrape_pdf_dir,
-                self.scrape_image_dir,
-                self.scrape_text_dir,
-                self.scrape_formula_dir,
-                self.scrape_meta_dir
-            ]:
-                directory.mkdir(parents=True, exist_ok=True)
+            missing = [d for d in self._leaf_dirs() if d not in ResultsStorage._known_dirs]
+            await asyncio.gather(*(aiofiles.os.makedirs(d, exist_ok=True) for d in missing))
+            ResultsStorage._known_dirs.update(missing)
+            self._dirs_ready.set()
             logger.info(f"Successfully created storage directories for query: {self.query}")
         except Exception as e:
             logger.error(f"Failed to create directories: {e}")
             raise RuntimeError(f"Could not initialize storage: {e}")
     
-    async def save_search_results(self, query: str, results: List[str]) -> Optional[str]:
-        """Save search results to JSON"""
+    async def save_search_results(self, query: str, results: List[str], metadata: Optional[Dict] = None) -> Optional[str]:
+        """Save search results to JSON. Raises ValueError if any URL is invalid."""
+        validated_urls = _URL_LIST_ADAPTER.validate_python(results)
         try:
+            if not self._dirs_ready.is_set():
+                await self._ensure_directories_ready()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"query_results_{timestamp}.json"
-            filepath = self.search_results_dir / filename
+            filepath = os.path.join(self._search_results_dir_s, filename)
             
-            result_data = SearchResultModel(
+            # URLs are already validated, so skip per-field model validation
+            result_data = SearchResultModel.model_construct(
                 query=query,
-                urls=results,
-                timestamp=timestamp
+                urls=[str(u) for u in validated_urls],
+                timestamp=timestamp,
+                metadata=metadata
             )
             
-            async with aiofiles.open(filepath, "w", encoding="utf-8") as f:
-                await f.write(result_data.model_dump_json(indent=2))
+            await _atomic_write(filepath, _dumps(result_data.model_dump(mode="json")))
                 
-            return str(filepath)
+            return filepath
         except Exception as e:
             logger.error(f"Failed to save search results: {e}")
             return None
 
+    async def get_latest_results_file(self) -> Optional[str]:
+        """Return the name of the newest search results JSON, or None if there are none"""
+        latest, latest_ctime = None, -1.0
+        try:
+            # The ctime comes from the same directory scan, no per-file stat pass
+            with os.scandir(self._search_results_dir_s) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        ctime = entry.stat().st_ctime
+                        if ctime > latest_ctime:
+                            latest, latest_ctime = entry.name, ctime
+        except FileNotFoundError:
+            return None
+        return latest
+
+    async def load_results(self, filename: str) -> Optional[Dict]:
+        """Load a search results JSON by file name"""
+        try:
+            async with aiofiles.open(os.path.join(self._search_results_dir_s, filename), "rb") as f:
+                return _loads(await f.read())
+        except Exception as e:
+            logger.error(f"Failed to load search results {filename}: {e}")
+            return None
+
+    async def load_latest_results(self) -> Optional[Dict]:
+        """Load the newest search results JSON, if any"""
+        latest = await self.get_latest_results_file()
+        if latest is None:
+            return None
+        return await self.load_results(latest)
+
     async def save_scraped_content(self, url: str, content_type: str, content: Union[str, bytes], metadata: Optional[Dict] = None) -> bool:
         """Unified method to save all scraped content types"""
         try:
+            if not self._dirs_ready.is_set():
+                await self._ensure_directories_ready()
             # Get the appropriate directory
-            content_dir = {
-                "html": self.scrape_html_dir,
-                "pdf": self.scrape_pdf_dir,
-                "image": self.scrape_image_dir,
-                "text": self.scrape_text_dir,
-                "formula": self.scrape_formula_dir
-            }.get(content_type)
+            content_dir = self._content_dirs_s.get(content_type)
             
             if not content_dir:
                 logger.error(f"Unknown content type: {content_type}")
                 return False
             
             # Save content
-            filename = f"{self._get_safe_filename(url)}.{content_type}"
-            filepath = content_dir / filename
+            safe_name = self._get_safe_filename(url)
+            filepath = os.path.join(content_dir, f"{safe_name}.{content_type}")
             
-            async with aiofiles.open(filepath, "wb" if isinstance(content, bytes) else "w", encoding="utf-8") as f:
-                await f.write(content)
+            await _atomic_write(filepath, content if isinstance(content, bytes) else content.encode("utf-8"))
             
             # Save metadata if provided
             if metadata:
-                meta_filename = f"{self._get_safe_filename(url)}_metadata.json"
-                meta_filepath = self.scrape_meta_dir / meta_filename
-                async with aiofiles.open(meta_filepath, "w", encoding="utf-8") as f:
-                    await f.write(json.dumps({
-                        "url": url,
-                        "content_type": content_type,
-                        "timestamp": datetime.now().isoformat(),
-                        **metadata
-                    }, indent=2))
+                await self._write_metadata(url, safe_name, content_type, metadata)
             
             return True
         except Exception as e:
             logger.error(f"Failed to save {content_type} content from {url}: {e}")
             return False
 
+    async def save_scrape_binary(self, url: str, content_type: str, response: aiohttp.ClientResponse, metadata: Optional[Dict] = None) -> Optional[str]:
+        """Stream a binary response body (PDF, image) to disk without buffering it whole.
+
+        Returns the saved file's path, or None if it could not be saved.
+        """
+        try:
+            if not self._dirs_ready.is_set():
+                await self._ensure_directories_ready()
+            content_dir = self._content_dirs_s.get(content_type)
+            if not content_dir:
+                logger.error(f"Unknown content type: {content_type}")
+                return None
+            
+            safe_name = self._get_safe_filename(url)
+            filepath = os.path.join(content_dir, f"{safe_name}.{content_type}")
+            
+            async with _atomic_open(filepath, "wb") as f:
+                await _stream_to_file(f, response)
+            
+            if metadata:
+                await self._write_metadata(url, safe_name, content_type, metadata)
+            
+            return filepath
+        except Exception as e:
+            logger.error(f"Failed to stream {content_type} content from {url}: {e}")
+            return None
+
+    async def save_scrape_metadata(self, url: str, result: Dict, **context) -> bool:
+        """Queue the metadata JSON for a scraped page: its result dict plus query context"""
+        try:
+            if not self._dirs_ready.is_set():
+                await self._ensure_directories_ready()
+            await self._write_metadata(url, self._get_safe_filename(url), "html", {**context, **result})
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save scrape metadata for {url}: {e}")
+            return False
+
+    async def _write_metadata(self, url: str, safe_name: str, content_type: str, metadata: Dict) -> None:
+        """Queue a metadata JSON for the batching writer task"""
+        meta_filepath = os.path.join(self._scrape_meta_dir_s, f"{safe_name}_metadata.json")
+        data = _dumps({
+            "url": url,
+            "content_type": content_type,
+            "timestamp": datetime.now().isoformat(),
+            **metadata
+        })
+        if self._meta_writer is None or self._meta_writer.done():
+            self._meta_writer = asyncio.create_task(self._drain_metadata())
+        await self._meta_queue.put((meta_filepath, data))
+
+    async def _drain_metadata(self) -> None:
+        """Writer task: take whatever metadata is queued (up to a batch) and write it together"""
+        while True:
+            batch = [await self._meta_queue.get()]
+            while len(batch) < _META_BATCH_SIZE:
+                try:
+                    batch.append(self._meta_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                results = await asyncio.gather(
+                    *(_atomic_write(path, data) for path, data in batch),
+                    return_exceptions=True
+                )
+                for (path, _), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Failed to write metadata {path}: {result}")
+            finally:
+                for _ in batch:
+                    self._meta_queue.task_done()
+
+    async def flush(self) -> None:
+        """Wait until every queued metadata write is on disk"""
+        await self._meta_queue.join()
+
+    async def close(self) -> None:
+        """Flush pending metadata, stop the writer task and sync the directories once"""
+        await self.flush()
+        if self._meta_writer is not None and not self._meta_writer.done():
+            self._meta_writer.cancel()
+            try:
+                await self._meta_writer
+            except asyncio.CancelledError:
+                pass
+        self._meta_writer = None
+        await self.fsync_directories()
+
+    async def fsync_directories(self) -> None:
+        """Flush directory entries once per query instead of fsyncing every file"""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        
+        def _fsync_all():
+            for directory in [self._search_results_dir_s, self._scrape_meta_dir_s, *self._content_dirs_s.values()]:
+                try:
+                    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        
+        try:
+            await asyncio.to_thread(_fsync_all)
+        except OSError as e:
+            logger.error(f"Failed to fsync storage directories: {e}")
+
     def _get_safe_filename(self, text: str) -> str:
         """Convert URL to safe filename"""
-        safe = text.replace("://", "_").replace("/", "_").replace("?", "_").replace("=", "_")
-        return "".join(c for c in safe if c.isalnum() or c in ('_', '-', '.')).strip()[:200]
+        return _safe_filename(text)
 
     def _sanitize_query(self, query: str) -> str:
-        return "".join(c for c in query if c.isalnum() or c in (' ', '_', '-')).strip().replace(' ', '_')
+        return _QUERY_STRIP.sub('', query).strip().replace(' ', '_')
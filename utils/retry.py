@@ -0,0 +1,22 @@
+import time
+from typing import Callable, TypeVar
+from utils.config import config
+
+T = TypeVar("T")
+
+def with_retry(fn: Callable[[], T]) -> T:
+    """Call fn, retrying failures with exponential backoff per search.retry config.
+
+    The config is read on every call, so a reloaded config takes effect immediately.
+    """
+    retry_settings = config.search_config.retry
+    # Config values are in milliseconds
+    multiplier = retry_settings.wait_exponential_multiplier / 1000
+    max_wait = retry_settings.wait_exponential_max / 1000
+    for attempt in range(retry_settings.max_attempts):
+        try:
+            return fn()
+        except Exception:
+            if attempt + 1 == retry_settings.max_attempts:
+                raise
+            time.sleep(min(max_wait, multiplier * 2 ** attempt))
@@ -1,40 +1,47 @@
-from typing import List, Optional
+from typing import FrozenSet, List, Optional, Tuple
 import re
+from functools import lru_cache
 from urllib.parse import urlparse
 from utils.config import config
-import logging
 from utils.logger import logger
 
+_URL_FORMAT_RE = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE
+)
+
+@lru_cache(maxsize=2048)
+def _host_allowed(domain: str, allowed_exact: FrozenSet[str], allowed_suffixes: Tuple[str, ...]) -> bool:
+    """Check a domain against the allowed patterns; cached per (domain, patterns)."""
+    # Exact matches, then wildcard patterns (*.com, *.org) in a single endswith call
+    return domain in allowed_exact or domain.endswith(allowed_suffixes)
+
 class URLValidator:
+    _VIDEO_EXT = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.webm', '.flv')
+
     def __init__(self):
         """Initialize URL validator with configuration."""
-        self.allowed_domains = config.url_validation_config.allowed_domains
-        self.blocked_domains = config.url_validation_config.blocked_domains
-        self.blocked_extensions = config.url_validation_config.blocked_extensions
+        # Frozen to tuples; the cached host check uses the set/suffix forms derived below
+        self.allowed_domains = tuple(config.url_validation_config.allowed_domains)
+        self.blocked_domains = tuple(config.url_validation_config.blocked_domains)
+        self.blocked_extensions = tuple(config.url_validation_config.blocked_extensions)
+        self._allowed_exact = frozenset(self.allowed_domains)
+        # Wildcard patterns with the leading * and trailing . removed
+        self._allowed_suffixes = tuple(p.lstrip('*').rstrip('.') for p in self.allowed_domains if p.startswith('*'))
         self.max_content_size = config.url_validation_config.max_content_size
         self.allow_video_urls = config.url_validation_config.allow_video_urls
         self.allow_auth_required = config.url_validation_config.allow_auth_required
-        self.logger = logging.getLogger('search_system')
+        self.logger = logger
         logger.info("URLValidator initialized with configuration")
 
     def is_allowed_domain(self, url: str) -> bool:
         """Check if the URL's domain matches any allowed domain pattern."""
         try:
-            domain = urlparse(url).netloc
-            
-            # Check exact matches first
-            if domain in self.allowed_domains:
-                return True
-                
-            # Check for wildcard patterns (*.com, *.org)
-            for pattern in self.allowed_domains:
-                if pattern.startswith('*'):
-                    # Remove leading * and trailing . if present
-                    pattern = pattern.lstrip('*').rstrip('.')
-                    if domain.endswith(pattern):
-                        return True
-            
-            return False
+            return _host_allowed(urlparse(url).netloc, self._allowed_exact, self._allowed_suffixes)
         except Exception as e:
             self.logger.warning(f"Error checking domain for URL {url}: {str(e)}")
             return False
@@ -45,21 +52,19 @@ class URLValidator:
             parsed = urlparse(url)
             
             # Check domain restrictions
-            if self.allowed_domains and not self.is_allowed_domain(url):
+            if self.allowed_domains and not _host_allowed(parsed.netloc, self._allowed_exact, self._allowed_suffixes):
                 logger.warning(f"Domain not allowed: {url}")
                 return False
 
             # Check blocked domains
-            if self.blocked_domains and parsed.hostname in self.blocked_domains:
+            if config.is_domain_blocked(parsed.hostname):
                 logger.warning(f"Domain blocked: {url}")
                 return False
 
             # Check file extensions
-            if self.blocked_extensions:
-                path = parsed.path.lower()
-                if any(path.endswith(ext) for ext in self.blocked_extensions):
-                    logger.warning(f"URL blocked due to extension: {url}")
-                    return False
+            if config.has_blocked_extension(parsed.path):
+                logger.warning(f"URL blocked due to extension: {url}")
+                return False
 
             # Check authentication requirements
             if self.allow_auth_required:
@@ -73,31 +78,41 @@ class URLValidator:
             return False
 
     def validate_urls(self, urls: List[str]) -> List[str]:
-        """Validate a list of URLs and return valid ones."""
-        valid_urls = []
+        """Validate a list of URLs and return valid ones.
+
+        Same checks as validate_url, applied as a pipeline over the pre-parsed
+        batch with the cheapest filters first; rejections are logged once.
+        """
+        parsed = []
         for url in urls:
-            if self.validate_url(url):
-                valid_urls.append(url)
-            else:
-                logger.info(f"URL rejected: {url}")
+            try:
+                parsed.append((url, urlparse(url)))
+            except ValueError as e:
+                logger.error(f"URL validation failed for {url}: {str(e)}")
+
+        has_blocked_extension = config.has_blocked_extension
+        is_domain_blocked = config.is_domain_blocked
+        parsed = [(u, p) for u, p in parsed if not has_blocked_extension(p.path)]
+        parsed = [(u, p) for u, p in parsed if not is_domain_blocked(p.hostname)]
+        if self.allow_auth_required:
+            parsed = [(u, p) for u, p in parsed if not (p.username or p.password)]
+        if self.allowed_domains:
+            exact, suffixes = self._allowed_exact, self._allowed_suffixes
+            parsed = [(u, p) for u, p in parsed if _host_allowed(p.netloc, exact, suffixes)]
+
+        valid_urls = [u for u, _ in parsed]
+        rejected = len(urls) - len(valid_urls)
+        if rejected:
+            logger.info(f"Rejected {rejected} of {len(urls)} URLs")
         return valid_urls
 
     def _is_valid_format(self, url: str) -> bool:
         """Check if URL has a valid format."""
-        url_regex = re.compile(
-            r'^(?:http|ftp)s?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-            r'localhost|'  # localhost...
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE
-        )
-        return url_regex.match(url) is not None
+        return _URL_FORMAT_RE.match(url) is not None
 
     def _is_video_url(self, parsed_url) -> bool:
         """Check if URL is likely a video URL."""
-        video_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv']
-        return any(parsed_url.path.lower().endswith(ext) for ext in video_extensions)
+        return parsed_url.path.lower().endswith(self._VIDEO_EXT)
 
     def _requires_auth(self, parsed_url) -> bool:
         """Check if URL requires authentication."""
@@ -1,27 +1,78 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import aiohttp
 from bs4 import BeautifulSoup
 import logging
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 import random
 from utils.config import config
 from utils.logger import logger
 import asyncio
 
+try:
+    import lxml  # noqa: F401
+    # C-backed tree builder for BeautifulSoup
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# '://' is collapsed first, then the remaining separators are mapped in one pass
+_FILENAME_TRANS = str.maketrans({'/': '_', '.': '_', ':': '_'})
+
+# hrefs that are already absolute (or protocol-relative) and need no urljoin
+_ABSOLUTE_PREFIXES = ('http://', 'https://', '//')
+
 class BaseScraper(ABC):
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         """Initialize base scraper with configuration."""
         self.scraping_config = config.settings.scraping
         self.headers = self.scraping_config.headers
+        self._headers_base = dict(self.headers)
         self.user_agents = self.scraping_config.user_agents
+        # scraping.timeout is in milliseconds; built once and reused for every request
+        self._timeout = aiohttp.ClientTimeout(total=self.scraping_config.timeout / 1000)
+        self.max_concurrent = self.scraping_config.max_concurrent
+        self.max_content_size = config.url_validation_config.max_content_size
+        # Sessions passed in are owned by the caller; otherwise one is created lazily
+        self.session = session
+        self._owns_session = session is None
+        
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it with a per-host connection cap"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                resolver=self._make_resolver(),
+                limit=self.max_concurrent * 4,
+                limit_per_host=self.scraping_config.max_connections_per_host,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout
+            )
+            self._owns_session = True
+        return self.session
+
+    @staticmethod
+    def _make_resolver() -> aiohttp.abc.AbstractResolver:
+        """Use the aiodns-backed resolver when available, else aiohttp's threaded default"""
+        try:
+            return aiohttp.AsyncResolver()
+        except RuntimeError:
+            # AsyncResolver raises RuntimeError when aiodns is not installed
+            return aiohttp.ThreadedResolver()
+
+    async def close(self):
+        """Close the HTTP session if this scraper created it"""
+        if self._owns_session and self.session is not None and not self.session.closed:
+            await self.session.close()
         
     def get_headers(self) -> Dict[str, str]:
         """Get headers with random user agent"""
-        headers = self.headers.copy()
         if self.user_agents:
-            headers["User-Agent"] = random.choice(self.user_agents)
-        return headers
+            return {**self._headers_base, "User-Agent": random.choice(self.user_agents)}
+        return {**self._headers_base}
         
     async def delay_request(self):
         """Delay between requests based on rate limit config"""
@@ -30,35 +81,49 @@ class BaseScraper(ABC):
             await asyncio.sleep(delay)
             
     @abstractmethod
-    async def extract_content(self, url: str, content: str) -> Dict:
-        """Extract content from the page."""
+    async def extract_content(self, url: str, content: Union[str, BeautifulSoup]) -> Dict:
+        """Extract content from the page (raw HTML or an already parsed soup)."""
         pass
         
+    def parse_html(self, content: Union[str, bytes, BeautifulSoup]) -> BeautifulSoup:
+        """Parse HTML once; an existing soup is passed through so extractors can share it."""
+        if isinstance(content, BeautifulSoup):
+            return content
+        return BeautifulSoup(content, HTML_PARSER)
+        
     async def get_page_content(self, url: str) -> Optional[str]:
         """Get page content with proper headers and user agent rotation."""
         try:
             headers = self.get_headers()
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=self.scraping_config.timeout) as response:
-                    if response.status == 200:
-                        return await response.text()
+            async with self._get_session().get(url, headers=headers, timeout=self._timeout) as response:
+                if response.status != 200:
+                    return None
+                # Skip oversized pages before downloading the body
+                if response.content_length and response.content_length > self.max_content_size:
+                    logger.warning(f"Skipping {url}: {response.content_length} bytes exceeds max_content_size")
                     return None
+                # Decode with the declared charset instead of text()'s charset detection pass
+                raw = await response.read()
+                return raw.decode(response.charset or 'utf-8', errors='replace')
         except Exception as e:
             logger.error(f"Error fetching {url}: {str(e)}")
             return None
             
     def get_safe_filename(self, url: str) -> str:
         """Create a safe filename from URL."""
-        return url.replace('://', '_').replace('/', '_').replace('.', '_').replace(':', '_')[:255]
+        return url.replace('://', '_').translate(_FILENAME_TRANS)[:255]
         
     def extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Extract all links from the page."""
         links = []
+        links_append = links.append
+        # Protocol-relative links take the page's scheme
+        scheme = urlsplit(base_url).scheme or 'https'
         for link in soup.find_all('a', href=True):
             href = link['href']
-            if href.startswith('http') or href.startswith('//'):
-                links.append(href)
+            if href.startswith(_ABSOLUTE_PREFIXES):
+                links_append(href if href[0] != '/' else f"{scheme}:{href}")
             elif href.startswith('/'):
-                links.append(urljoin(base_url, href))
+                links_append(urljoin(base_url, href))
         return links
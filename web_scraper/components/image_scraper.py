@@ -1,4 +1,5 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+import asyncio
 import aiohttp
 import aiofiles
 from PIL import Image
@@ -10,6 +11,23 @@ from web_scraper.components.base_scraper import BaseScraper
 from utils.config import config
 from utils.logger import logger
 
+# Leading bytes of common image formats -> file extension
+_IMAGE_SIGNATURES = {
+    b'\xff\xd8\xff': 'jpeg',
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif',
+}
+
+def _sniff_image_type(header: bytes) -> Optional[str]:
+    """Return the image extension for a known magic-byte prefix, else None."""
+    for signature, ext in _IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return ext
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
 class ImageScraper(BaseScraper):
     def __init__(self):
         super().__init__()
@@ -17,66 +35,90 @@ class ImageScraper(BaseScraper):
         scrape_dir = base_dir / config.scraping_config.directories.scrape.base
         self.image_dir = scrape_dir / config.scraping_config.directories.scrape.images
         # Directory creation is handled by WebScraper.setup_directories
+        # Caps simultaneous image downloads per scraper
+        self._img_sem = asyncio.Semaphore(self.max_concurrent)
         
-    async def extract_content(self, url: str, content: str) -> Dict:
+    async def extract_content(self, url: str, content: Union[str, BeautifulSoup]) -> Dict:
         """Extract and download images from the page."""
-        soup = BeautifulSoup(content, 'html.parser')
-        image_links = self.extract_image_links(soup, url)
+        soup = self.parse_html(content)
+        # Identical CDN URLs are only downloaded once
+        image_links = list(dict.fromkeys(self.extract_image_links(soup, url)))
         
-        results = []
-        for img_url in image_links:
-            img_path = self.image_dir / f"{self.get_safe_filename(img_url)}"
-            if await self.download_image(img_url, img_path):
-                results.append(str(img_path))
+        results = [
+            img_path for img_path in await asyncio.gather(*map(self._download_bounded, image_links))
+            if img_path
+        ]
         
         return {
             'images': results,
             'count': len(results)
         }
         
+    async def _download_bounded(self, img_url: str) -> Optional[str]:
+        async with self._img_sem:
+            img_path = self.image_dir / f"{self.get_safe_filename(img_url)}"
+            if await self.download_image(img_url, img_path):
+                return str(img_path)
+            return None
+        
     def extract_image_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Extract image links from the page."""
         image_links = []
         for img in soup.find_all('img', src=True):
-            src = img['src'].lower()
-            if src.endswith(('.jpg', '.jpeg', '.png', '.gif')):
+            src = img['src']
+            # Match the extension case-insensitively but keep the original URL
+            if src.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
                 image_links.append(urljoin(base_url, src))
         return image_links
         
     async def download_image(self, url: str, save_path: Path) -> bool:
         """Download and validate an image."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
+            async with self._get_session().get(url, timeout=self._timeout) as response:
+                if response.status == 200:
+                    if response.content_length and response.content_length > self.max_content_size:
+                        logger.warning(f"Skipping image {url}: {response.content_length} bytes exceeds max_content_size")
+                        return False
+                    # Buffer the first bytes so the format can be sniffed before anything hits disk
+                    chunks = response.content.iter_chunked(65536)
+                    header = bytearray()
+                    async for chunk in chunks:
+                        header += chunk
+                        if len(header) >= 16:
+                            break
+                    sniffed_ext = _sniff_image_type(header)
+                    
+                    if sniffed_ext:
+                        ext = sniffed_ext
+                    else:
                         # Get image format from content type
                         content_type = response.headers.get('content-type', '').lower()
                         if 'image/' in content_type:
                             ext = content_type.split('/')[-1]
                         else:
                             ext = url.split('.')[-1].lower()
-                            
-                        # Save with correct extension
-                        save_path = save_path.with_suffix(f'.{ext}')
-                        
-                        # Download and validate image
-                        async with aiofiles.open(save_path, 'wb') as f:
-                            while True:
-                                chunk = await response.content.read(1024)
-                                if not chunk:
-                                    break
-                                await f.write(chunk)
                         
-                        # Validate image
-                        try:
-                            with Image.open(save_path) as img:
-                                img.verify()
-                            return True
-                        except Exception:
-                            logger.error(f"Invalid image file: {save_path}")
-                            save_path.unlink(missing_ok=True) # Use pathlib.Path.unlink
-                            return False
-                    return False
+                    # Save with correct extension
+                    save_path = save_path.with_suffix(f'.{ext}')
+                    
+                    # Download image
+                    async with aiofiles.open(save_path, 'wb') as f:
+                        await f.write(header)
+                        async for chunk in chunks:
+                            await f.write(chunk)
+                    
+                    # A recognised signature is enough; only unknown formats go through PIL
+                    if sniffed_ext:
+                        return True
+                    try:
+                        with Image.open(save_path) as img:
+                            img.verify()
+                        return True
+                    except Exception:
+                        logger.error(f"Invalid image file: {save_path}")
+                        save_path.unlink(missing_ok=True) # Use pathlib.Path.unlink
+                        return False
+                return False
         except Exception as e:
             logger.error(f"Failed to download image {url}: {str(e)}")
             return False
@@ -1,15 +1,18 @@
 from pathlib import Path
-from urllib.parse import urljoin
-from typing import List, Dict, Optional, Any
+from urllib.parse import urljoin, urlsplit
+from collections import OrderedDict, defaultdict
+from typing import List, Dict, Optional, Any, Union
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from datetime import datetime
 import json
 import re
 from bs4 import BeautifulSoup
-from web_scraper.components.base_scraper import BaseScraper 
+from web_scraper.components.base_scraper import BaseScraper, _ABSOLUTE_PREFIXES
 from utils.config import config
 from utils.logger import logger
 from utils.results_storage import ResultsStorage
+from utils.rate_limiter import RateLimiter
+from utils.html_text import extract_text
 import random
 import time
 import asyncio
@@ -19,20 +22,135 @@ import pytesseract
 from PIL import Image
 import io
 
+# Every non-alphanumeric character (underscore included, which maps to itself)
+_NON_ALNUM_RE = re.compile(r'\W')
+
+# Resource types aborted by page.route: pages that are only read as HTML skip
+# everything visual; fully scraped pages keep images/styles for screenshots
+_HTML_ONLY_BLOCKED = frozenset(("image", "font", "media", "stylesheet"))
+_FULL_PAGE_BLOCKED = frozenset(("font", "media"))
+
+# Elements captured as formula screenshots, matched in one query
+_FORMULA_SELECTOR = "math, .math, .equation"
+
+# Absolute http(s) sources of every image on the page
+_IMAGE_SRCS_JS = "() => Array.from(document.images, i => i.currentSrc || i.src).filter(s => /^https?:/.test(s))"
+
+# Max image srcs remembered for cross-page dedupe
+_SEEN_ASSETS_MAX = 10000
+
 class WebScraper(BaseScraper):
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, max_concurrent: Optional[int] = None):
+        super().__init__(session)
         self.query = None
         self.results_storage = None
-        self.max_concurrent = config.settings.scraping.max_concurrent
+        self.max_concurrent = max_concurrent or config.settings.scraping.max_concurrent
+        # Global cap on in-flight page scrapes
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
         self.rate_limit_config = config.settings.scraping.rate_limit
         self.user_agents = config.settings.scraping.user_agents
         self.timeout = config.settings.scraping.timeout
+        # One token bucket per host, refilled at the configured requests per minute
+        requests_per_second = self.rate_limit_config.requests_per_minute / 60
+        self._limiters = defaultdict(lambda: RateLimiter(requests_per_second))
+        # Next dispatch time for scrape_with_full_features, spaced by delay_between_requests
+        self._next_slot = 0.0
+        self._slot_lock = asyncio.Lock()
+        # LRU of image src -> future of its saved path, so assets shared by the pages of one
+        # scrape batch are fetched once; cleared for every batch
+        self._seen_assets: OrderedDict = OrderedDict()
+        # Scraped content is persisted by a single writer task fed through this queue
+        self._write_q: asyncio.Queue = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+        # Playwright driver and browser are started once and shared; scrape() pages also share
+        # one context, while scrape_url opens a context per URL to rotate the user agent
+        self._pw = None
+        self._browser = None
+        self._context = None
+        self._browser_lock = asyncio.Lock()
         logger.info("WebScraper initialized.")
 
+    async def _enqueue_write(self, url: str, content_type: str, content, metadata: Optional[Dict] = None):
+        """Queue scraped content for the writer task so fetchers don't wait on disk I/O"""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._drain_writes())
+        await self._write_q.put((self.results_storage, url, content_type, content, metadata))
+
+    async def _drain_writes(self):
+        """Writer task: persist queued content until the shutdown sentinel arrives"""
+        while True:
+            item = await self._write_q.get()
+            try:
+                if item is None:
+                    return
+                storage, url, content_type, content, metadata = item
+                await storage.save_scraped_content(url, content_type, content, metadata)
+            except Exception as e:
+                logger.error(f"Writer task failed to save content: {e}")
+            finally:
+                self._write_q.task_done()
+
+    async def _ensure_browser(self):
+        """Start Playwright and launch the shared browser on first use"""
+        async with self._browser_lock:
+            if self._browser is None:
+                self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch(headless=True)
+        return self._browser
+
+    async def _shared_context(self):
+        """Open the browser context shared by the pages of scrape() on first use"""
+        browser = await self._ensure_browser()
+        async with self._browser_lock:
+            if self._context is None:
+                self._context = await browser.new_context(user_agent=random.choice(self.user_agents))
+        return self._context
+
+    async def _close_browser(self):
+        """Close the shared context, browser and Playwright driver"""
+        if self._context is not None:
+            await self._context.close()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+        self._pw = self._browser = self._context = None
+
+    async def aclose(self):
+        """Stop the writer task, the shared browser and the HTTP session if this scraper created it"""
+        if self._writer is not None and not self._writer.done():
+            await self._write_q.put(None)
+            await self._writer
+        if self.results_storage is not None:
+            await self.results_storage.close()
+        await self._close_browser()
+        await self.close()
+        logger.info("WebScraper closed.")
+
+    @staticmethod
+    async def _block_resources(page, blocked: frozenset):
+        """Abort requests for the given resource types on this page"""
+        async def handle(route):
+            if route.request.resource_type in blocked:
+                await route.abort()
+            else:
+                await route.continue_()
+        await page.route("**/*", handle)
+
+    async def _acquire_rate_limit(self, url: str):
+        """Wait for the rate limiter of the URL's host; applied to page navigations only"""
+        await self._limiters[urlsplit(url).netloc].acquire()
+
     async def set_query(self, query: str):
         """Set the current query and initialize storage"""
         logger.info(f"Setting query: {query}")
+        if self.results_storage is not None:
+            # Let the previous query's storage finish its pending writes
+            await self._write_q.join()
+            await self.results_storage.close()
         self.query = query
+        # Saved image paths point into the previous query's directory
+        self._seen_assets.clear()
         base_dir = Path(config.settings.directories.base) / self._sanitize_query(query)
         self.results_storage = ResultsStorage(base_dir, query)
         await self.results_storage.initialize()
@@ -40,7 +158,7 @@ class WebScraper(BaseScraper):
 
     def _sanitize_query(self, query: str) -> str:
         """Convert query to safe directory name"""
-        return "".join(c if c.isalnum() else "_" for c in query)
+        return _NON_ALNUM_RE.sub("_", query)
 
     async def scrape(self, urls: List[str]) -> List[Dict]:
         """Scrape a list of URLs with full feature support"""
@@ -51,108 +169,181 @@ class WebScraper(BaseScraper):
         if not await self.results_storage.is_ready():
             raise RuntimeError("Results storage is not ready")
         
-        results = []
-        
         # Scrape first N URLs fully based on config
+        urls = list(dict.fromkeys(urls))
         top_n = min(config.settings.search.scrape_top_n, len(urls))
+        # Images are deduplicated within this batch only
+        self._seen_assets.clear()
         
         try:
-            async with async_playwright() as playwright:
-                browser = await playwright.chromium.launch()
-                context = await browser.new_context()
-                
-                for i, url in enumerate(urls):
-                    try:
-                        result = {"url": url, "success": False}
-                        
-                        # Basic scraping for all URLs
-                        page = await context.new_page()
-                        timeout_seconds = self.timeout / 1000
-                        response = await page.goto(url, timeout=timeout_seconds * 1000)
-                        
-                        if response.status >= 400:
-                            result["error"] = f"HTTP {response.status}"
-                            results.append(result)
-                            continue
-                        
-                        content_type = response.headers.get("content-type", "")
-                        
-                        # Handle PDFs
-                        if "pdf" in content_type.lower() and config.settings.scraping.save_pdfs:
-                            pdf_content = await response.body()
-                            await self.results_storage.save_scraped_content(
-                                url, "pdf", pdf_content, {"content_type": "pdf"}
-                            )
-                            result["pdf_saved"] = True
-                        
-                        # Full scraping for top N URLs
-                        if i < top_n:
-                            html = await page.content()
-                            
-                            # Save HTML
-                            if config.settings.scraping.save_html:
-                                await self.results_storage.save_scraped_content(
-                                    url, "html", html, {"content_type": "html"}
-                                )
-                            
-                            # Extract and save text
-                            if config.settings.scraping.save_text:
-                                soup = BeautifulSoup(html, "html.parser")
-                                text = soup.get_text(" ", strip=True)
-                                await self.results_storage.save_scraped_content(
-                                    url, "text", text, {"content_type": "text"}
-                                )
-                            
-                            # Capture screenshots of formulas
-                            if config.settings.scraping.capture_formulas:
-                                math_elements = await page.query_selector_all("math, .math, .equation")
-                                for j, element in enumerate(math_elements):
-                                    screenshot = await element.screenshot(
-                                        type="png",
-                                        quality=config.settings.scraping.formula_screenshot_quality
-                                    )
-                                    await self.results_storage.save_scraped_content(
-                                        url, "formula", screenshot, 
-                                        {"formula_index": j, "content_type": "formula"}
-                                    )
-                            
-                            # Save images
-                            if config.settings.scraping.save_images:
-                                images = await page.query_selector_all("img")
-                                for img in images:
-                                    try:
-                                        src = await img.get_attribute("src")
-                                        if src and src.startswith(('http', 'https')):
-                                            async with aiohttp.ClientSession() as session:
-                                                async with session.get(src) as resp:
-                                                    img_data = await resp.read()
-                                                    await self.results_storage.save_scraped_content(
-                                                        url, "image", img_data,
-                                                        {"src": src, "content_type": resp.content_type}
-                                                    )
-                                    except Exception as e:
-                                        logger.error(f"Failed to save image from {url}: {e}")
-                        
-                        result["success"] = True
-                        results.append(result)
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to scrape {url}: {e}")
-                        results.append({"url": url, "error": str(e), "success": False})
-                    finally:
-                        await page.close()
-                
-                await context.close()
-                await browser.close()
+            context = await self._shared_context()
+            
+            # Pages share one browser context and are fetched concurrently
+            results = await asyncio.gather(
+                *(self._scrape_page(context, url, full=i < top_n) for i, url in enumerate(urls))
+            )
+            # Make sure everything queued for this query is written before returning;
+            # the directories are synced once, when the storage is closed
+            await self._write_q.join()
+            await self.results_storage.flush()
         except Exception as e:
             logger.error(f"Error in scrape: {e}")
             raise
         
         return results
 
-    async def extract_content(self, url: str, html_content: str) -> Dict:  
+    async def _scrape_page(self, context, url: str, full: bool) -> Dict:
+        """Scrape a single URL in its own page of the shared browser context"""
+        # Wait for the host's rate limit before taking a concurrency slot or opening a page,
+        # so URLs queued behind one host don't idle in slots other hosts could use
+        await self._acquire_rate_limit(url)
+        async with self.semaphore:
+            return await self._scrape_page_unbounded(context, url, full)
+
+    async def _scrape_page_unbounded(self, context, url: str, full: bool) -> Dict:
+        result = {"url": url, "success": False}
+        page = None
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Basic scraping for all URLs
+            page = await context.new_page()
+            await self._block_resources(page, _FULL_PAGE_BLOCKED if full else _HTML_ONLY_BLOCKED)
+            timeout_seconds = self.timeout / 1000
+            # HTML-only pages are read as soon as the DOM is parsed; fully scraped pages
+            # wait for "load" so images and formulas are rendered before screenshots
+            response = await page.goto(
+                url,
+                wait_until="load" if full else "domcontentloaded",
+                timeout=timeout_seconds * 1000
+            )
+            
+            if response.status >= 400:
+                result["error"] = f"HTTP {response.status}"
+                return result
+            
+            content_type = response.headers.get("content-type", "")
+            
+            # Handle PDFs; the browser's viewer page has no content worth scraping
+            if "pdf" in content_type.lower():
+                if config.settings.scraping.save_pdfs:
+                    pdf_content = await response.body()
+                    await self._enqueue_write(
+                        url, "pdf", pdf_content, {"content_type": "pdf"}
+                    )
+                    result["pdf_saved"] = True
+                result["success"] = True
+                return result
+            
+            # Full scraping for top N URLs
+            if full:
+                html = await page.content()
+                
+                # Save HTML
+                if config.settings.scraping.save_html:
+                    await self._enqueue_write(
+                        url, "html", html, {"content_type": "html"}
+                    )
+                
+                # Extract and save text
+                if config.settings.scraping.save_text:
+                    # Streamed through the tokenizer; no DOM is built just for the text
+                    text = extract_text(html)
+                    await self._enqueue_write(
+                        url, "text", text, {"content_type": "text"}
+                    )
+                
+                # Capture screenshots of formulas
+                if config.settings.scraping.capture_formulas:
+                    math_elements = await page.query_selector_all(_FORMULA_SELECTOR)
+                    # Invisible or tiny elements are skipped before paying for a capture
+                    boxes = await asyncio.gather(*(e.bounding_box() for e in math_elements))
+                    visible = [
+                        (j, element) for j, (element, box) in enumerate(zip(math_elements, boxes))
+                        if box and box["width"] > 4 and box["height"] > 4
+                    ]
+                    screenshots = await asyncio.gather(
+                        *(element.screenshot(
+                            type="png",
+                            quality=config.settings.scraping.formula_screenshot_quality
+                        ) for _, element in visible),
+                        return_exceptions=True
+                    )
+                    for (j, _), screenshot in zip(visible, screenshots):
+                        if isinstance(screenshot, Exception):
+                            logger.error(f"Failed to capture formula {j} on {url}: {screenshot}")
+                            continue
+                        await self._enqueue_write(
+                            url, "formula", screenshot, 
+                            {"formula_index": j, "content_type": "formula"}
+                        )
+                
+                # Save images
+                if config.settings.scraping.save_images:
+                    # One evaluate() round trip; the browser has already resolved relative srcs
+                    srcs = await page.evaluate(_IMAGE_SRCS_JS)
+                    # Downloads run in parallel, capped per host by the session's connector
+                    saved = await asyncio.gather(
+                        *(self._save_image(url, src) for src in srcs), return_exceptions=True
+                    )
+                    result["images"] = []
+                    for path in saved:
+                        if isinstance(path, Exception):
+                            logger.error(f"Failed to save image from {url}: {path}")
+                        elif path:
+                            result["images"].append(path)
+            
+            result["success"] = True
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to scrape {url}: {e}")
+            return {"url": url, "error": str(e), "success": False}
+        finally:
+            if page is not None:
+                await page.close()
+
+    async def _save_image(self, url: str, src: str) -> Optional[str]:
+        """Download an image through the shared session and store it, once per src and batch.
+
+        Returns the saved path (also for a src already saved in this batch), or None if skipped.
+        """
+        pending = self._seen_assets.get(src)
+        if pending is not None:
+            self._seen_assets.move_to_end(src)
+            # Shielded: a cancelled page must not cancel the path other pages wait on
+            return await asyncio.shield(pending)
+        # Claimed before the fetch so concurrent pages embedding the same src wait for it
+        pending = asyncio.get_running_loop().create_future()
+        self._seen_assets[src] = pending
+        if len(self._seen_assets) > _SEEN_ASSETS_MAX:
+            self._seen_assets.popitem(last=False)
+        path = None
+        try:
+            # Not rate limited: the limiter paces page navigations, and a page's images would
+            # otherwise queue one per token while the page holds its concurrency slot
+            async with self._get_session().get(src) as resp:
+                # Decided from the headers, before any of the body is read
+                if resp.status != 200 or not resp.content_type.startswith("image/"):
+                    logger.debug(f"Skipping image {src}: HTTP {resp.status}, {resp.content_type}")
+                    return None
+                if resp.content_length and resp.content_length > self.max_content_size:
+                    logger.debug(f"Skipping image {src}: {resp.content_length} bytes")
+                    return None
+                # Stream straight to disk rather than reading the whole body into memory;
+                # named after the src, so the images of one page don't overwrite each other
+                path = await self.results_storage.save_scrape_binary(
+                    src, "image", resp,
+                    {"page_url": url, "content_type": resp.content_type}
+                )
+                return path
+        finally:
+            pending.set_result(path)
+            # A failed src may be retried by a later page
+            if path is None and self._seen_assets.get(src) is pending:
+                del self._seen_assets[src]
+
+    async def extract_content(self, url: str, html_content: Union[str, BeautifulSoup]) -> Dict:  
+        try:
+            soup = self.parse_html(html_content)
             title = soup.title.string.strip() if soup.title and soup.title.string else 'No title found'
             description = self._extract_description(soup)
             
@@ -189,17 +380,31 @@ class WebScraper(BaseScraper):
 
     def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         links = set()
+        links_add = links.add
+        # Protocol-relative links take the page's scheme
+        scheme = urlsplit(base_url).scheme or 'https'
         for a_tag in soup.find_all('a', href=True):
             href = a_tag['href']
-            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                full_url = urljoin(base_url, href)
-                links.add(full_url)
+            if not href or href.startswith(('#', 'javascript:')):
+                continue
+            # Absolute links need no join; only relative ones pay for urljoin's parsing
+            if href.startswith(_ABSOLUTE_PREFIXES):
+                links_add(href if href[0] != '/' else f"{scheme}:{href}")
+            else:
+                links_add(urljoin(base_url, href))
         return list(links)
 
     async def _wait_for_rate_limit(self):
+        """Reserve the next dispatch slot, then sleep until it outside the lock"""
         delay = self.rate_limit_config.delay_between_requests
-        if delay > 0:
-            await asyncio.sleep(delay)
+        if delay <= 0:
+            return
+        async with self._slot_lock:
+            now = asyncio.get_running_loop().time()
+            wait = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + delay
+        if wait:
+            await asyncio.sleep(wait)
 
     async def scrape_with_full_features(self, urls: List[str]) -> List[Dict]:
         """Scrape a list of URLs."""
@@ -219,6 +424,7 @@ class WebScraper(BaseScraper):
         if not urls:
             logger.warning("No URLs provided for scraping.")
             return []
+        urls = list(dict.fromkeys(urls))
 
         scraping_mode_settings = getattr(config.settings.scraping.modes, 'standard', None)
         if scraping_mode_settings is None:
@@ -232,10 +438,9 @@ class WebScraper(BaseScraper):
 
         logger.info(f"Starting scrape for {len(urls)} URLs with mode 'standard' for query: '{self.query}'.")
 
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-
+        await self._ensure_browser()
         for url_to_scrape in urls:
-            task = asyncio.create_task(self._scrape_url_with_semaphore(semaphore, url_to_scrape, scraping_params))
+            task = asyncio.create_task(self._scrape_url_with_semaphore(self.semaphore, url_to_scrape, scraping_params))
             tasks.append(task)
         
         results_batch = await asyncio.gather(*tasks, return_exceptions=True)
@@ -264,6 +469,15 @@ class WebScraper(BaseScraper):
             return await self.scrape_url(url, scraping_params)
 
     async def scrape_url(self, url: str, scraping_params: Dict) -> Dict:
+        """Save the HTML of a single URL and its extracted metadata.
+
+        Runs in a fresh, cheap context (with a rotated user agent) of the shared
+        browser; only the context is closed afterwards, never the browser.
+
+        Navigation waits only for DOMContentLoaded: the page is read once via
+        page.content(), so late scripts and trackers are not waited for. Content
+        rendered purely by scripts after that point may be missing.
+        """
         if url.lower().endswith('.pdf'):
             logger.warning(f"Skipping PDF scraping for {url}")
             return {'url': url, 'error': 'PDF scraping not supported'}
@@ -273,44 +487,39 @@ class WebScraper(BaseScraper):
             return {'url': url, 'error': 'ResultsStorage not initialized'}
 
         try:
-            async with async_playwright() as playwright:
-                browser = await playwright.chromium.launch(headless=True)
-                context = await browser.new_context(user_agent=random.choice(self.user_agents))
+            browser = await self._ensure_browser()
+            context = await browser.new_context(user_agent=random.choice(self.user_agents))
+            try:
                 page = await context.new_page()
+                await self._block_resources(page, _HTML_ONLY_BLOCKED)
+                timeout_seconds = self.timeout / 1000
+                logger.info(f"Navigating to {url} with timeout {timeout_seconds}s")
+                await page.goto(url, wait_until="domcontentloaded", timeout=timeout_seconds * 1000)  # Playwright uses ms
                 
-                try:
-                    timeout_seconds = self.timeout / 1000
-                    logger.info(f"Navigating to {url} with timeout {timeout_seconds}s")
-                    await page.goto(url, timeout=timeout_seconds * 1000)  # Playwright uses ms
-                    
-                    html_content = await page.content()
-                    
-                    # Save HTML content
-                    save_result = await self.results_storage.save_scraped_content(url, "html", html_content)
-                    if not save_result:
-                        return {'url': url, 'error': 'Failed to save HTML content'}
-                    
-                    extracted_data = await self.extract_content(url, html_content)
-                    
-                    metadata = {
-                        'url': url,
-                        'query': self.query,
-                        'timestamp': datetime.now().isoformat(),
-                        'scraping_mode_params': scraping_params,
-                        'html_file_path': str(save_result),
-                        **extracted_data
-                    }
-                    
-                    await self.results_storage.save_scrape_metadata(url, metadata)
-                    
-                    return {
-                        'url': url,
-                        'status': 'success',
-                        'html_file': str(save_result),
-                        **extracted_data
-                    }
-                finally:
-                    await browser.close()
+                html_content = await page.content()
+                
+                # Save HTML content
+                save_result = await self.results_storage.save_scraped_content(url, "html", html_content)
+                if not save_result:
+                    return {'url': url, 'error': 'Failed to save HTML content'}
+                
+                extracted_data = await self.extract_content(url, html_content)
+                
+                result = {
+                    'url': url,
+                    'status': 'success',
+                    'html_file': str(save_result),
+                    **extracted_data
+                }
+                # The metadata file is this same result plus the query context; the storage
+                # writer task serializes it once
+                await self.results_storage.save_scrape_metadata(
+                    url, result, query=self.query, scraping_mode_params=scraping_params
+                )
+                
+                return result
+            finally:
+                await context.close()
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
             return {'url': url, 'error': str(e)}
@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import aiohttp
 import aiofiles
 from pathlib import Path
@@ -16,9 +16,9 @@ class PDFScraper(BaseScraper):
         self.pdf_dir = scrape_dir / config.scraping_config.directories.scrape.pdfs
         # Directory creation is handled by WebScraper.setup_directories
         
-    async def extract_content(self, url: str, content: str) -> Dict:
+    async def extract_content(self, url: str, content: Union[str, BeautifulSoup]) -> Dict:
         """Extract and download PDFs from the page."""
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = self.parse_html(content)
         pdf_links = self.extract_pdf_links(soup, url)
         
         results = []
@@ -44,17 +44,13 @@ class PDFScraper(BaseScraper):
     async def download_file(self, url: str, save_path: Path) -> bool:
         """Download a PDF file."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        async with aiofiles.open(save_path, 'wb') as f:
-                            while True:
-                                chunk = await response.content.read(1024)
-                                if not chunk:
-                                    break
-                                await f.write(chunk)
-                        return True
+            async with self._get_session().get(url, timeout=self._timeout) as response:
+                if response.status != 200:
                     return False
+                async with aiofiles.open(save_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(65536):
+                        await f.write(chunk)
+                return True
         except Exception as e:
             logger.error(f"Failed to download PDF {url}: {str(e)}")
             return False
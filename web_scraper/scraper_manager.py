@@ -5,6 +5,10 @@ from utils.config import config
 import logging
 import asyncio
 from utils.logger import logger
+import re
+
+# http(s) URL with no whitespace, quotes or angle brackets
+_HTTP_URL_MATCH = re.compile(r'^https?://[^\s<>"]+$').match
 
 class ScraperManager:
     def __init__(self):
@@ -15,16 +19,10 @@ class ScraperManager:
 
     def validate_urls(self, urls: List[str]) -> List[str]:
         """Validate URLs before scraping."""
-        valid_urls = []
-        for url in urls:
-            try:
-                # Basic URL validation
-                if url.startswith('http://') or url.startswith('https://'):
-                    valid_urls.append(url)
-                else:
-                    logger.warning(f"Invalid URL format: {url}")
-            except Exception as e:
-                logger.error(f"Error validating URL {url}: {str(e)}")
+        # Basic URL validation
+        valid_urls = [url for url in urls if isinstance(url, str) and _HTTP_URL_MATCH(url)]
+        if len(valid_urls) != len(urls):
+            logger.warning(f"Dropped {len(urls) - len(valid_urls)} URLs with an invalid format")
         return valid_urls
 
     def get_search_results(self, query: str, num_results: int = 2) -> List[str]:
@@ -1,57 +1,279 @@
-from typing import List
+from typing import Dict, List, Optional
+from collections import Counter
+from pathlib import Path
+import hashlib
+import json
+import os
+import uuid
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from utils.logger import logger
+from utils.ttl_cache import TTLCache
+from utils.cache_files import prune_oldest
+
+# Most per-document term-count files kept on disk; the oldest are pruned beyond this
+_TERM_COUNTS_MAX_FILES = 20000
+# Term-count saves between two pruning scans (the first save of a process also prunes)
+_TERM_COUNTS_PRUNE_EVERY = 256
+# Most saved indexes (matrix + vocabulary pairs) kept on disk
+_INDEX_MAX_ENTRIES = 512
+
+def _digest(*parts: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.digest()
 
 class BM25Scorer:
-    def __init__(self, k1: float = 1.2, b: float = 0.75):
-        """Initialize BM25 scorer with parameters."""
-        self.vectorizer = TfidfVectorizer()
+    def __init__(self, k1: float = 1.2, b: float = 0.75, cache_dir: Optional[Path] = None):
+        """Initialize BM25 scorer with parameters.
+
+        With a cache_dir, built indexes are saved there and reloaded for an identical corpus.
+        """
+        # Raw term counts only (BM25 computes its own IDF); single-character tokens count too
+        self.vectorizer = CountVectorizer(lowercase=True, token_pattern=r'(?u)\b\w+\b', dtype=np.float64)
         self.k1 = k1
         self.b = b
+        # (documents x terms) matrix of per-term BM25 contributions, built by index()
+        self._scores: Optional[sparse.csc_matrix] = None
+        self._num_docs = 0
+        # Digest of the indexed corpus; re-indexing identical documents is skipped
+        self._corpus_key: Optional[bytes] = None
+        # Normalized scores per (query digest, corpus digest)
+        self._score_cache = TTLCache(maxsize=128, ttl=900)
+        # Term counts per document digest; pages seen in earlier corpora aren't tokenized again
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._term_counts = TTLCache(maxsize=512, ttl=3600)
+        self._term_saves = 0
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+    def index(self, documents: List[str]) -> None:
+        """Precompute the BM25 contribution of every (term, document) pair.
+
+        Query-time scoring then only sums the columns of the query terms.
+        """
+        corpus_key = _digest(*documents)
+        if corpus_key == self._corpus_key:
+            return
+        # Only set once the index for this corpus is complete
+        self._corpus_key = None
+        self._num_docs = len(documents)
+        if self._load_index(corpus_key):
+            self._corpus_key = corpus_key
+            return
+        X = self._count_terms(documents)
+        if X is None:
+            self._scores = None
+            self._corpus_key = corpus_key
+            return
+
+        num_docs, num_terms = X.shape
+        doc_lengths = np.asarray(X.sum(axis=1)).ravel()
+        avg_doc_len = doc_lengths.mean() or 1.0
+
+        # Document frequency per term, and the Lucene (always positive) IDF
+        df = np.bincount(X.indices, minlength=num_terms)
+        idf = np.log((num_docs - df + 0.5) / (df + 0.5) + 1.0)
+
+        # Per-document 1 / (k1 * length norm), so the term weight below needs a single division:
+        # w * tf / (tf + norm) == w - w / (1 + tf / norm)  (Lucene's LUCENE-9071 rewrite)
+        norm_inverse = 1.0 / (self.k1 * (1 - self.b + self.b * doc_lengths / avg_doc_len))
+
+        # Work on the non-zeros only: row of each stored tf, then the BM25 term weight
+        rows = np.repeat(np.arange(num_docs), np.diff(X.indptr))
+        weight = idf[X.indices] * (self.k1 + 1)
+        data = weight - weight / (1.0 + X.data * norm_inverse[rows])
 
-    def score(self, query: str, documents: List[str]) -> List[float]:
-        """Calculate BM25 scores for documents against the query."""
-        if not documents:
-            return []
+        # CSC so the query's term columns can be sliced cheaply; float32 halves the bytes the
+        # query-time sum streams, well within the precision a [0, 1] ranking needs
+        self._scores = sparse.csr_matrix(
+            (data.astype(np.float32), X.indices, X.indptr), shape=X.shape
+        ).tocsc()
+        self._corpus_key = corpus_key
+        self._save_index(corpus_key)
 
+    def _count_terms(self, documents: List[str]) -> Optional[sparse.csr_matrix]:
+        """(documents x terms) count matrix, the equivalent of vectorizer.fit_transform.
+
+        Counts come from the per-document cache where possible. None if no document has any term.
+        """
+        vocabulary: Dict[str, int] = {}
+        indices: List[int] = []
+        data: List[int] = []
+        indptr = [0]
+        for document in documents:
+            key = _digest(document)
+            counts = self._term_counts.get(key)
+            if counts is None:
+                counts = self._load_term_counts(key)
+                if counts is None:
+                    counts = Counter(self._analyzer(document))
+                    self._save_term_counts(key, counts)
+                self._term_counts.set(key, counts)
+            for term, tf in counts.items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                data.append(tf)
+            indptr.append(len(indices))
+        if not vocabulary:
+            return None
+        # Query-time lookups (score, score_batch's transform) go through the vectorizer's vocabulary
+        self.vectorizer.vocabulary_ = vocabulary
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), indices, indptr),
+            shape=(len(documents), len(vocabulary))
+        )
+
+    def _term_counts_path(self, doc_key: bytes) -> Path:
+        # Counts depend only on the document and the analyzer, not on k1 or b
+        return self.cache_dir / "terms" / f"{doc_key.hex()}.json"
+
+    def _load_term_counts(self, doc_key: bytes) -> Optional[Dict[str, int]]:
+        """Term counts saved for this document by an earlier run, or None"""
+        if self.cache_dir is None:
+            return None
+        path = self._term_counts_path(doc_key)
         try:
-            # Convert documents to lowercase and remove special characters
-            documents = [doc.lower() for doc in documents]
-            query = query.lower()
-
-            # Vectorize documents
-            X = self.vectorizer.fit_transform(documents)
-            query_vec = self.vectorizer.transform([query])
-
-            # Get document lengths
-            doc_lengths = np.array(X.sum(axis=1)).ravel()
-            avg_doc_len = doc_lengths.mean()
-
-            # Calculate BM25 scores
-            scores = []
-            for i in range(len(documents)):
-                # Get term frequencies for this document
-                tf = X[i, :].toarray()[0]
-                
-                # Calculate IDF for each term
-                # Add small epsilon to avoid division by zero
-                epsilon = 1e-10
-                idf = np.log((len(documents) + epsilon) / 
-                           (X[:, tf > 0].sum() + epsilon))
-                
-                # Calculate BM25 score for this document
-                # Add small epsilon to avoid division by zero
-                score = np.sum(idf * ((tf * (self.k1 + 1)) / 
-                                    (tf + self.k1 * (1 - self.b + 
-                                                     self.b * (doc_lengths[i] / (avg_doc_len + epsilon))))))
-                scores.append(score)
+            with open(path, "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable BM25 term counts {path}: {e}")
+            return None
 
-            # Normalize scores to range [0, 1]
-            scores = np.array(scores)
-            if np.max(scores) > 0:
-                scores = scores / np.max(scores)
+    def _save_term_counts(self, doc_key: bytes, counts: Dict[str, int]) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._term_counts_path(doc_key)
+        # Unique temp name: another process may be saving the same document right now
+        tmp_path = path.with_name(f"{path.name}.tmp.{uuid.uuid4().hex}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(counts, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not save BM25 term counts: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._term_saves += 1
+        if (self._term_saves - 1) % _TERM_COUNTS_PRUNE_EVERY == 0:
+            prune_oldest(path.parent, ".json", _TERM_COUNTS_MAX_FILES)
+
+    def score_batch(self, queries: List[str]) -> List[List[float]]:
+        """Score several queries against the indexed documents with one sparse product.
+
+        Each row is normalized to [0, 1] like score().
+        """
+        if self._scores is None or not queries:
+            return [[0.0] * self._num_docs for _ in queries]
+        try:
+            # Binary bag of words per query, as score() counts each query term once
+            Q = self.vectorizer.transform(queries)
+            Q.data[:] = 1
+            scores = (Q @ self._scores.T).toarray()
+            max_scores = scores.max(axis=1, keepdims=True)
+            np.divide(scores, max_scores, out=scores, where=max_scores > 0)
             return scores.tolist()
+        except Exception as e:
+            logger.error(f"Error calculating BM25 batch scores: {e}")
+            return [[0.0] * self._num_docs for _ in queries]
+
+    def _index_paths(self, corpus_key: bytes):
+        # Parameters are part of the key: the stored weights depend on k1 and b
+        name = f"{corpus_key.hex()}_{self.k1:g}_{self.b:g}"
+        return self.cache_dir / f"{name}.npz", self.cache_dir / f"{name}.vocab.json"
+
+    def _load_index(self, corpus_key: bytes) -> bool:
+        """Restore a saved index for this corpus; False if there is none"""
+        if self.cache_dir is None:
+            return False
+        matrix_path, vocab_path = self._index_paths(corpus_key)
+        try:
+            with open(vocab_path, "rb") as f:
+                vocabulary = json.load(f)
+            self._scores = sparse.load_npz(matrix_path).tocsc()
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable BM25 index cache {matrix_path}: {e}")
+            return False
+        self.vectorizer.vocabulary_ = vocabulary
+        return True
+
+    def _save_index(self, corpus_key: bytes) -> None:
+        if self.cache_dir is None:
+            return
+        matrix_path, vocab_path = self._index_paths(corpus_key)
+        # Temp files then rename, so a reader never sees a half-written index; unique names,
+        # as another process may be saving the same corpus right now
+        suffix = f".tmp.{uuid.uuid4().hex}"
+        tmp_matrix = matrix_path.with_name(matrix_path.name + suffix)
+        tmp_vocab = vocab_path.with_name(vocab_path.name + suffix)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Through a file object: save_npz would append '.npz' to the temp name
+            with open(tmp_matrix, "wb") as f:
+                sparse.save_npz(f, self._scores, compressed=False)
+            os.replace(tmp_matrix, matrix_path)
+            vocabulary = {term: int(i) for term, i in self.vectorizer.vocabulary_.items()}
+            with open(tmp_vocab, "w", encoding="utf-8") as f:
+                json.dump(vocabulary, f, ensure_ascii=False)
+            os.replace(tmp_vocab, vocab_path)
+        except Exception as e:
+            logger.warning(f"Could not save BM25 index cache: {e}")
+            for tmp_path in (tmp_matrix, tmp_vocab):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        # Indexes are saved once per new corpus, so the directory is checked on every save
+        for removed in prune_oldest(self.cache_dir, ".npz", _INDEX_MAX_ENTRIES):
+            try:
+                os.remove(removed[:-len(".npz")] + ".vocab.json")
+            except OSError:
+                pass
+
+    def score(self, query: str, documents: Optional[List[str]] = None) -> List[float]:
+        """Calculate BM25 scores for documents against the query.
+
+        Passing documents (re)builds the index first; otherwise the last index is used.
+        """
+        if documents is not None:
+            if not documents:
+                return []
+            self.index(documents)
+
+        try:
+            if self._scores is None:
+                return [0.0] * self._num_docs
+
+            cache_key = (_digest(query), self._corpus_key)
+            cached = self._score_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+            vocabulary = self.vectorizer.vocabulary_
+            term_ids = sorted({vocabulary[t] for t in self._analyzer(query) if t in vocabulary})
+            if not term_ids:
+                return [0.0] * self._num_docs
+
+            scores = np.asarray(self._scores[:, term_ids].sum(axis=1)).ravel()
+
+            # Normalize scores to range [0, 1]
+            max_score = scores.max()
+            if max_score > 0:
+                scores = scores / max_score
+            result = scores.tolist()
+            self._score_cache.set(cache_key, tuple(result))
+            return result
 
         except Exception as e:
             logger.error(f"Error calculating BM25 scores: {e}")
-            return [0.0] * len(documents)
+            return [0.0] * self._num_docs
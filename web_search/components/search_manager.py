@@ -1,10 +1,37 @@
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Set
+import asyncio
+from urllib.parse import urlsplit
 from tenacity import retry, stop_after_attempt, wait_exponential, Retrying # Added Retrying
 import logging
 import os
 from utils.logger import logger
+from utils.ttl_cache import TTLCache
 from utils.config_models import SearchConfig # Added import
 
+# Query parameters that only track the click and never change the page
+_TRACKING_PARAMS = frozenset(('gclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', 'ref_src'))
+
+def _strip_tracking(query: str) -> str:
+    return "&".join(
+        pair for pair in query.split("&")
+        if pair and not pair.startswith("utm_") and pair.partition("=")[0] not in _TRACKING_PARAMS
+    )
+
+def _canonical_url(url: str) -> str:
+    """Dedupe key for a URL: scheme and host are case-insensitive, a trailing '/', the fragment
+    and tracking parameters (utm_*, gclid, ...) are ignored"""
+    parts = urlsplit(url)
+    query = _strip_tracking(parts.query) if parts.query else ""
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}?{query}"
+
+def _extend_unique(all_results: List[str], seen: Set[str], urls: Iterable[str]) -> None:
+    """Append the URLs not seen yet, keeping their first-seen order"""
+    for url in urls:
+        key = _canonical_url(url)
+        if key not in seen:
+            seen.add(key)
+            all_results.append(url)
+
 class SearchManager:
     def __init__(self, search_engines: Dict[str, Any], config_model: SearchConfig): # Changed 'config' to 'config_model' and type
         """Initialize search manager with engines and configuration."""
@@ -13,37 +40,95 @@ class SearchManager:
         self.max_results = self.config_model.max_results # Use direct attribute access
         self.fallback_order = self.config_model.fallback_order # Use direct attribute access
         # self.retry_config is no longer needed as we use self.config_model.retry directly
+        # Recent per-engine results, keyed by (engine, query, max_results); spares repeat API calls
+        self._engine_cache = TTLCache(maxsize=256, ttl=60)
         logger.info(f"Initialized SearchManager with max_results={self.max_results} and fallback_order={self.fallback_order}")
 
 
+    def _search_engine(self, engine_name: str, query: str) -> List[str]:
+        """Search one engine, serving recent identical searches from the cache."""
+        cache_key = (engine_name, query, self.max_results)
+        urls = self._engine_cache.get(cache_key)
+        if urls is None:
+            urls = self.search_engines[engine_name].search(query, self.max_results)
+            # An empty answer may be transient; caching it would mute the engine for this query
+            if urls:
+                self._engine_cache.set(cache_key, urls)
+        return urls
+
     # @retry decorator removed, _get_retry_config removed.
     def _perform_search(self, query: str) -> List[str]:
         """Internal method to perform search."""
-        logger.info(f"Starting search for query: {query}")
+        logger.info("Starting search for query: %s", query)
+        # Engines overlap heavily; duplicates would be fetched and scored twice downstream
         all_results = []
+        seen: Set[str] = set()
         
         # Get results from all search engines
         for engine_name in self.fallback_order:
             try:
-                logger.info(f"Searching with {engine_name}...")
-                search_engine = self.search_engines[engine_name]
-                
+                logger.info("Searching with %s...", engine_name)
                 # API key checks are now done in individual search engine __init__ methods.
-                urls = search_engine.search(query, self.max_results)
+                urls = self._search_engine(engine_name, query)
                 
                 if urls:
-                    logger.info(f"Found {len(urls)} results from {engine_name}")
-                    all_results.extend(urls)
+                    logger.info("Found %s results from %s", len(urls), engine_name)
+                    _extend_unique(all_results, seen, urls)
                     
                     # If we have enough results, break early
                     if len(all_results) >= self.max_results * 2:
-                        logger.info(f"Reached sufficient results ({len(all_results)}), stopping early")
+                        logger.info("Reached sufficient results (%s), stopping early", len(all_results))
                         break
             except Exception as e:
-                logger.error(f"Search failed for {engine_name}: {str(e)}")
+                logger.error("Search failed for %s: %s", engine_name, e)
                 continue
         
-        logger.info(f"Total results collected: {len(all_results)}")
+        logger.info("Total results collected: %s", len(all_results))
+        return all_results
+
+    async def perform_search_async(self, query: str) -> List[str]:
+        """Async counterpart of perform_search: engines are queried concurrently.
+
+        Failures are not retried here: every engine already retries its own requests
+        (utils.retry.with_retry), and a failed engine is logged and skipped.
+        """
+        logger.info("Starting concurrent search for query: %s", query)
+
+        async def run(engine_name: str):
+            logger.info("Searching with %s...", engine_name)
+            try:
+                # Engines use blocking HTTP clients, so each runs in a worker thread
+                return engine_name, await asyncio.to_thread(self._search_engine, engine_name, query)
+            except Exception as e:
+                logger.error("Search failed for %s: %s", engine_name, e)
+                return engine_name, None
+
+        tasks = [asyncio.create_task(run(name)) for name in self.fallback_order]
+        results_by_engine: Dict[str, List[str]] = {}
+        # Unique URLs over the engines finished so far, for the early-stop check
+        seen: Set[str] = set()
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                engine_name, urls = await next_done
+                if urls:
+                    logger.info("Found %s results from %s", len(urls), engine_name)
+                    results_by_engine[engine_name] = urls
+                    seen.update(map(_canonical_url, urls))
+                    if len(seen) >= self.max_results * 2:
+                        logger.info("Reached sufficient results (%s), stopping early", len(seen))
+                        break
+        finally:
+            # Stops waiting on the slower engines only: their worker threads can't be
+            # interrupted and finish their HTTP calls in the background (still filling the cache)
+            for task in tasks:
+                task.cancel()
+
+        # Keep the configured engine priority in the combined, deduplicated list
+        all_results: List[str] = []
+        seen.clear()
+        for name in self.fallback_order:
+            _extend_unique(all_results, seen, results_by_engine.get(name, ()))
+        logger.info("Total results collected: %s", len(all_results))
         return all_results
 
     def perform_search(self, query: str) -> List[str]:
@@ -1 +1,7 @@
-
+try:
+    import orjson
+    # Parses the raw response bytes directly, no decode step
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    import json
+    json_loads = json.loads
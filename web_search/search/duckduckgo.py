@@ -1,24 +1,31 @@
 from typing import List
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+from requests.adapters import HTTPAdapter
 from utils.config import config
+from utils.retry import with_retry
+from web_search.search import json_loads
 
 class DuckDuckGoSearch:
-    @retry(
-        stop=stop_after_attempt(config.search_config.retry.max_attempts),
-        wait=wait_exponential(
-            multiplier=config.search_config.retry.wait_exponential_multiplier / 1000, # Convert ms to s for tenacity
-            max=config.search_config.retry.wait_exponential_max / 1000 # Convert ms to s for tenacity
-        )
-    )
+    _URL = "https://api.duckduckgo.com/"
+
+    def __init__(self):
+        # Keep-alive session: repeat searches reuse the pooled TCP/TLS connection
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=0))
+
     def search(self, query: str, max_results: int = 10) -> List[str]:
         """Search using DuckDuckGo API."""
+        return with_retry(lambda: self._search(query, max_results))
+
+    def _search(self, query: str, max_results: int) -> List[str]:
         try:
-            url = f"https://api.duckduckgo.com/?q={query}&format=json"
-            response = requests.get(url)
+            # requests URL-encodes params; raw interpolation broke on '&', '#' and spaces
+            response = self._session.get(
+                self._URL, params={"q": query, "format": "json"}, timeout=config.search_config.timeout
+            )
             response.raise_for_status()
             
-            data = response.json()
+            data = json_loads(response.content)
             results = []
             
             # Extract URLs from related topics
@@ -1,7 +1,9 @@
 from typing import List
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+from requests.adapters import HTTPAdapter
 from utils.config import config
+from utils.retry import with_retry
+from web_search.search import json_loads
 import os
 
 class TavilySearch:
@@ -9,16 +11,15 @@ class TavilySearch:
         self.api_key = os.getenv('TAVILY_API_KEY')
         if not self.api_key:
             raise ValueError("TAVILY_API_KEY not found in environment variables")
+        # Keep-alive session: repeat searches reuse the pooled TCP/TLS connection
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=0))
 
-    @retry(
-        stop=stop_after_attempt(config.search_config.retry.max_attempts),
-        wait=wait_exponential(
-            multiplier=config.search_config.retry.wait_exponential_multiplier / 1000, # Convert ms to s for tenacity
-            max=config.search_config.retry.wait_exponential_max / 1000 # Convert ms to s for tenacity
-        )
-    )
     def search(self, query: str, max_results: int = 10) -> List[str]:
         """Search using Tavily API."""
+        return with_retry(lambda: self._search(query, max_results))
+
+    def _search(self, query: str, max_results: int) -> List[str]:
         try:
             url = "https://api.tavily.com/search"
             params = {
@@ -27,10 +28,10 @@ class TavilySearch:
                 "limit": max_results
             }
             
-            response = requests.get(url, params=params)
+            response = self._session.get(url, params=params, timeout=config.search_config.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = json_loads(response.content)
             results = []
             
             if 'data' in data and 'results' in data['data']:
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Tuple
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,13 +11,30 @@ from web_search.components.search_manager import SearchManager
 from web_search.components.bm25 import BM25Scorer
 from utils.logger import logger
 from utils.results_storage import ResultsStorage
+from utils.ttl_cache import TTLCache
+from utils.fetch_cache import FetchCache
+from utils.html_text import extract_text
+from pathlib import Path
 import asyncio
+import heapq
+import threading
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 import aiohttp
 
+_FETCH_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+# Requests in flight at once; matches the connector's pool so no fetch waits on a busy pool slot
+_FETCH_CONCURRENCY = 32
+# Seconds an idle pooled connection stays open (aiohttp's default is 15)
+_FETCH_KEEPALIVE = 60
+
 class WebSearcher:
     def __init__(self):
         """Initialize the web searcher with all components."""
         self.url_validator = URLValidator()
+        # Validation is a pure function of the URL and config; results seen on earlier queries are reused
+        self._validate_url = lru_cache(maxsize=4096)(self.url_validator.validate_url)
         self.search_engines = {
             "duckduckgo": DuckDuckGoSearch(),
             "tavily": TavilySearch(),
@@ -32,113 +49,222 @@ class WebSearcher:
         
         self.bm25_scorer = BM25Scorer(
             k1=config.settings.bm25.k1,
-            b=config.settings.bm25.b
+            b=config.settings.bm25.b,
+            cache_dir=config.settings.bm25.index_cache_dir
         )
+        self._bm25_lock = threading.Lock()
         
         # Initialize results storage with query parameter
         self.results_storage = None
         self.results_file = None  # Initialize results_file
+        # Ranked URLs of recent queries, keyed by (query, max_results)
+        self._results_cache = TTLCache(maxsize=64, ttl=60)
+        # Page bodies persisted across queries and runs; revalidated with ETag/Last-Modified once stale
+        url_validation = config.settings.url_validation
+        fetch_cache_ttl = url_validation.url_fetch_cache_ttl
+        self._fetch_cache = FetchCache(
+            Path(config.settings.directories.base) / "_http_cache",
+            fetch_cache_ttl,
+            url_validation.url_fetch_cache_max_entries
+        ) if fetch_cache_ttl > 0 else None
+        # Per-request timeout, built once rather than on every fetch
+        self._request_timeout_s = url_validation.url_fetch_request_timeout
+        self._request_timeout = aiohttp.ClientTimeout(total=self._request_timeout_s)
+        self._max_fetch_bytes = url_validation.url_fetch_max_bytes
+        self._fetch_semaphore = asyncio.Semaphore(_FETCH_CONCURRENCY)
+        # Created on first fetch and kept across queries, so pooled connections and DNS answers are reused
+        self._session: Optional[aiohttp.ClientSession] = None
         logger.info("WebSearcher initialized with all components")
 
-    async def search(self, query: str) -> List[str]:
-        """Perform web search and return ranked results."""
-        logger.info(f"Starting search for query: {query}")
-        from pathlib import Path
+    async def search(self, query: str) -> Tuple[str, ...]:
+        """Perform web search and return ranked results.
+
+        The tuple is immutable, so the cached ranking is returned as is, without a copy.
+        """
+        logger.info("Starting search for query: %s", query)
+        # Bound once; the settings don't change during a search
+        max_results = config.settings.search.max_results
+        bm25_settings = config.settings.bm25
+        cache_key = (query, max_results)
+        cached = self._results_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached results for query: %s", query)
+            return cached
         base_dir = Path(config.settings.directories.base) / "_".join(query.split())
         self.results_storage = ResultsStorage(base_dir, query)
         
         # Get raw search results
-        all_results = self.search_manager.perform_search(query)
+        all_results = await self.search_manager.perform_search_async(query)
         
         if not all_results:
-            logger.warning(f"No results found for query: {query}")
-            return []
+            logger.warning("No results found for query: %s", query)
+            return ()
 
-        # Validate URLs
+        # Validate URLs lazily, stopping after max_results accepted ones; each accepted URL
+        # starts fetching right away, overlapping the rest of validation with its download
         valid_results = []
-        for url in all_results:
-            if self.url_validator.validate_url(url):
-                valid_results.append(url)
-                
-                # If we have enough valid results, break early
-                if len(valid_results) >= config.settings.search.max_results:
-                    break
+        fetch_tasks = []
+        session = await self._ensure_session()
+        for url in islice(filter(self._validate_url, all_results), max_results):
+            valid_results.append(url)
+            fetch_tasks.append(asyncio.create_task(self._fetch_single_url(session, url)))
+            # Validation never awaits; yield so the new task actually starts its request now
+            await asyncio.sleep(0)
 
         # Get content for each URL
-        url_contents = await self._get_url_contents(valid_results)
-        
-        # Calculate BM25 scores
-        scores = self.bm25_scorer.score(query, url_contents)
+        url_contents = await self._gather_contents(fetch_tasks)
         
-        # Combine URLs with their scores
-        scored_results = list(zip(valid_results, scores))
+        # Failed fetches come back empty; they can't score and have nothing to justify a rank
+        fetched = [(url, content) for url, content in zip(valid_results, url_contents) if content]
+        if not fetched:
+            logger.warning("No page content could be fetched for query: %s", query)
+            return ()
+        fetched_urls, fetched_contents = zip(*fetched)
+
+        # Tokenizing and the sparse sums run in a worker thread, keeping other fetches serviced
+        scores = await asyncio.to_thread(self._score_contents, query, list(fetched_contents))
         
-        # Sort by score
-        scored_results.sort(key=lambda x: x[1], reverse=True)
+        # Top max_results by score; fetched_urls never holds more, so this ranks them all
+        ranked = tuple(
+            url for url, _ in heapq.nlargest(
+                max_results, zip(fetched_urls, scores), key=itemgetter(1)
+            )
+        )
 
         metadata = {
             'search_engines': list(self.search_engines.keys()),
-            'max_results': config.settings.search.max_results,
+            'max_results': max_results,
             'bm25_config': {
-                'k1': config.settings.bm25.k1,
-                'b': config.settings.bm25.b
+                'k1': bm25_settings.k1,
+                'b': bm25_settings.b
             }
         }
         results_file_path = await self.results_storage.save_search_results(
             query=query,
-            results=[url for url, _ in scored_results],
+            results=ranked,
             metadata=metadata
         )
         if results_file_path:
-            logger.info(f"Search results saved to: {results_file_path}")
+            logger.info("Search results saved to: %s", results_file_path)
 
-        return [url for url, _ in scored_results[:config.settings.search.max_results]]
+        self._results_cache.set(cache_key, ranked)
+        return ranked
+
+    def _score_contents(self, query: str, contents: List[str]) -> List[float]:
+        """Index the fetched pages once (a no-op for an unchanged corpus), then score the query."""
+        # The scorer holds one index; concurrent searches must not interleave index and score
+        with self._bm25_lock:
+            self.bm25_scorer.index(contents)
+            return self.bm25_scorer.score(query)
 
     async def _fetch_single_url(self, session: aiohttp.ClientSession, url: str) -> str:
         """Helper to fetch content from a single URL asynchronously."""
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            # Use timeout from config
-            request_timeout = config.settings.url_validation.url_fetch_request_timeout
-            async with session.get(url, headers=headers, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=request_timeout)) as response:
-                response.raise_for_status() # Raise an exception for HTTP errors 4xx/5xx
-                if 'text/html' in response.headers.get('Content-Type', '').lower() or \
-                   'text/plain' in response.headers.get('Content-Type', '').lower():
-                    # Consider using BeautifulSoup here for cleaner text extraction from HTML
-                    return await response.text()
-                else:
-                    logger.warning(f"Skipping non-text content for {url} (Content-Type: {response.headers.get('Content-Type')})")
+            cached = await self._fetch_cache.get(url) if self._fetch_cache else None
+            if cached is not None and FetchCache.is_fresh(cached, self._fetch_cache.ttl):
+                return cached["body"]
+            
+            headers = {'User-Agent': _FETCH_USER_AGENT}
+            # A stale cached copy is revalidated instead of downloaded again
+            if cached is not None:
+                if cached.get("etag"):
+                    headers['If-None-Match'] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers['If-Modified-Since'] = cached["last_modified"]
+            async with self._fetch_semaphore, session.get(
+                url, headers=headers, allow_redirects=True, timeout=self._request_timeout
+            ) as response:
+                if response.status == 304 and cached is not None:
+                    await self._fetch_cache.set(url, cached["body"], cached.get("etag"), cached.get("last_modified"))
+                    return cached["body"]
+                # Status and type are checked directly; an HTTP error is an expected outcome, not a fault
+                if response.status >= 400:
+                    logger.warning("Skipping %s: HTTP %s", url, response.status)
+                    return ""
+                content_type = response.headers.get('Content-Type', '').lower()
+                if 'text/html' not in content_type and 'text/plain' not in content_type:
+                    logger.warning("Skipping non-text content for %s (Content-Type: %s)", url, response.headers.get('Content-Type'))
                     return ""
+                body = await self._read_capped(response)
+                if 'text/html' in content_type:
+                    # Rank and cache visible text only; markup, scripts and styles would skew BM25
+                    body = await asyncio.to_thread(extract_text, body)
+                if self._fetch_cache:
+                    await self._fetch_cache.set(
+                        url, body, response.headers.get('ETag'), response.headers.get('Last-Modified')
+                    )
+                return body
         except aiohttp.ClientError as e:
-            logger.error(f"aiohttp.ClientError fetching {url}: {str(e)}")
+            logger.error("aiohttp.ClientError fetching %s: %s", url, e)
             return ""
         except asyncio.TimeoutError:
-            logger.error(f"Timeout error fetching {url} after {request_timeout} seconds.")
+            logger.error("Timeout error fetching %s after %s seconds.", url, self._request_timeout_s)
             return ""
         except Exception as e:
-            logger.error(f"Unexpected error fetching {url}: {str(e)}")
+            logger.error("Unexpected error fetching %s: %s", url, e)
             return ""
 
-    async def _get_url_contents(self, urls: List[str]) -> List[str]:
-        """Get content from URLs asynchronously using aiohttp."""
-        contents = []
+    async def _read_capped(self, response: aiohttp.ClientResponse) -> str:
+        """Read at most url_fetch_max_bytes of the body and decode it with the declared charset.
+
+        Ranking only needs the start of a page; the rest is never downloaded, and
+        text()'s charset detection pass is skipped.
+        """
+        limit = self._max_fetch_bytes
+        buf = bytearray()
+        async for chunk in response.content.iter_chunked(65536):
+            buf += chunk
+            if len(buf) >= limit:
+                del buf[limit:]
+                break
+        return buf.decode(response.charset or 'utf-8', errors='replace')
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Return the shared fetch session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = self._fetch_session()
+        return self._session
+
+    async def close(self):
+        """Close the shared fetch session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _fetch_session(self) -> aiohttp.ClientSession:
+        """Create the ClientSession used to fetch page contents."""
         # Overall timeout for the ClientSession, can be configured
-        session_timeout_total = config.settings.url_validation.url_fetch_session_timeout_total
-        conn_timeout = config.settings.url_validation.url_fetch_connection_timeout
+        url_validation = config.settings.url_validation
+        session_timeout_total = url_validation.url_fetch_session_timeout_total
+        conn_timeout = url_validation.url_fetch_connection_timeout
         
         timeout = aiohttp.ClientTimeout(total=session_timeout_total, connect=conn_timeout)
-        
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            tasks = [self._fetch_single_url(session, url) for url in urls]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    # Errors are already logged in _fetch_single_url
-                    contents.append("") 
-                else:
-                    contents.append(result)
-        return contents
+        # Few connections per host so one slow server can't hold the whole pool; DNS answers are reused.
+        # Idle connections are kept long enough to carry over to the user's next query, sparing
+        # the TCP and TLS handshakes for hosts that recur across searches
+        connector = aiohttp.TCPConnector(
+            limit=_FETCH_CONCURRENCY,
+            limit_per_host=4,
+            ttl_dns_cache=300,
+            use_dns_cache=True,
+            keepalive_timeout=_FETCH_KEEPALIVE,
+            enable_cleanup_closed=True
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    @staticmethod
+    async def _gather_contents(tasks) -> List[str]:
+        """Await fetch tasks in order; failures become empty documents."""
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Errors are already logged in _fetch_single_url
+        return ["" if isinstance(result, Exception) else result for result in results]
+
+    async def _get_url_contents(self, urls: List[str]) -> List[str]:
+        """Get content from URLs asynchronously using aiohttp."""
+        session = await self._ensure_session()
+        return await self._gather_contents(
+            [self._fetch_single_url(session, url) for url in urls]
+        )
 
     def get_search_stats(self) -> dict:
         """Get current search configuration and statistics."""